@@ -0,0 +1,28 @@
+# Compares per-row calls of example/module.st's compare through the generic
+# entry point with a single compare.map call over the same columns.
+# Run from the repository root per `python benchmarks/batch.py`.
+import random
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module, batch
+
+num_rows = 200_000
+
+
+if __name__ == "__main__":
+    module = import_module("example/module.st", use_cache=False)
+    xs = [random.uniform(-10, 10) for _ in range(num_rows)]
+    ys = [random.uniform(-10, 10) for _ in range(num_rows)]
+
+    start = time.perf_counter()
+    rows = [module.compare(x, y) for x, y in zip(xs, ys)]
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = batch(module.compare, (xs, ys))
+    bulk = time.perf_counter() - start
+
+    assert [list(column) for column in zip(*rows)] == list(columns)
+    print(f"compare over {num_rows} rows: per call {per_call:.2f}s, batch {bulk:.3f}s ({per_call/bulk:.1f}x)")
@@ -0,0 +1,47 @@
+# Measures compilation of a small .st file that imports a Python helper module with
+# thousands of hinted functions, when the binding table is built and when it is reused.
+# Run from the repository root per `python benchmarks/bindings.py`.
+import tempfile
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+from sigmastar import integration
+
+helper = '''from typing import Callable
+def scale{i}(x: float, factor: float) -> float: return x * factor
+def apply{i}(f: Callable[[float], float], xs: list) -> list: return [f(x) for x in xs]
+'''
+
+source = '''* "sigmastar.ext"
+* "helpers"
+main() {
+    R.print(scale0(2.0, 3.0))
+}
+'''
+
+
+def measure(path: str, repeats: int = 10) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        import_module(path, use_cache=False)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "helpers.py"), "w", encoding="utf-8") as file:
+            file.write("".join(helper.format(i=i) for i in range(2000)))
+        path = os.path.join(tmp, "main.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        sys.path.insert(0, tmp)
+        start = time.perf_counter()
+        import_module(path, use_cache=False)
+        print(f"first compile, builds the table of 4000 functions: {time.perf_counter()-start:.4f}s")
+        print(f"later compiles, reuse the table:                   {measure(path):.4f}s")
+        integration._tables.clear()
+        print(f"compile after clearing the table:                  {measure(path, 1):.4f}s")
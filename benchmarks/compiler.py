@@ -0,0 +1,51 @@
+# Tracks how compile time scales with program size on synthetic programs.
+# Run from the repository root per `python benchmarks/compiler.py [sizes...]`,
+# for example `python benchmarks/compiler.py 1000 10000 100000`.
+# Time per function should stay roughly constant; phases whose time per function
+# grows more than the allowed factor from the smallest to the largest program are
+# reported as super-linear and make the script exit with an error.
+import tempfile
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+from sigmastar.stats import phases
+from synthetic import generate
+
+allowed_growth = 2.0  # tolerated growth of seconds per function, to absorb noise and cache effects
+
+
+def measure(size: int, repeats: int = 3):
+    """Best compilation stats of a synthetic program with the given number of functions."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"synthetic{size}.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(generate(size))
+        best = None
+        for _ in range(repeats):
+            _, stats = import_module(path, use_cache=False, stats=True)
+            if best is None or stats.total < best.total:
+                best = stats
+    return best
+
+
+def main(sizes: list[int]) -> int:
+    shown = [name for name in phases if name not in ("cache", "exec")]
+    print(f"{'functions':>10} {'tokens':>10} {'total s':>9} " + " ".join(f"{name:>9}" for name in shown) + "  us/function")
+    per_function = dict()
+    for size in sizes:
+        stats = measure(size, repeats=1 if size >= 5_000 else 3)
+        per_function[size] = {name: stats.seconds.get(name, 0.0)/size for name in shown}
+        print(f"{size:>10} {stats.tokens:>10} {stats.total:>9.3f} "
+              + " ".join(f"{stats.seconds.get(name, 0.0):>9.3f}" for name in shown)
+              + f"  {stats.total/size*1e6:>11.1f}")
+    smallest, largest = per_function[min(sizes)], per_function[max(sizes)]
+    slow = [name for name in shown if smallest[name] and largest[name]/smallest[name] > allowed_growth]
+    for name in slow:
+        print(f"super-linear: {name} takes {largest[name]/smallest[name]:.1f}x longer per function "
+              f"at {max(sizes)} than at {min(sizes)} functions", file=sys.stderr)
+    return 1 if slow else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main([int(arg) for arg in sys.argv[1:]] or [1_000, 3_000, 10_000]))
@@ -0,0 +1,61 @@
+# Stress test for concurrent compilation in a thread pool. Every module declares
+# the same primitive letter and computes a different result, so any state shared
+# between compilations shows up as "Primitive already exists" or wrong results.
+# Run from the repository root per `python benchmarks/concurrency.py`.
+from concurrent.futures import ThreadPoolExecutor
+import tempfile
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+
+num_modules = 50
+num_compiles = 400
+num_threads = 32
+
+template = '''* "sigmastar.ext"
+C {{RR}}
+
+apply(f, x) CRR {{
+    return f(x)
+}}
+
+scale(x) RR {{
+    return R.mul(x, {factor}.0)
+}}
+
+run(x) RR {{
+    return apply(scale, x)
+}}
+'''
+
+
+def write_modules(directory: str) -> list[str]:
+    paths = []
+    for i in range(num_modules):
+        path = os.path.join(directory, f"tenant{i}.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(template.format(factor=i))
+        paths.append(path)
+    return paths
+
+
+def compile_and_run(args):
+    i, path, use_cache = args
+    module = import_module(path, use_cache=use_cache)
+    expected = 2.0 * (i % num_modules)
+    result = module.run(2.0)
+    assert result == expected, f"{path}: expected {expected}, got {result}"
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_modules(directory)
+        for use_cache in (False, True):
+            jobs = [(i, paths[i % num_modules], use_cache) for i in range(num_compiles)]
+            start = time.perf_counter()
+            with ThreadPoolExecutor(num_threads) as pool:
+                list(pool.map(compile_and_run, jobs))
+            elapsed = time.perf_counter() - start
+            print(f"{num_compiles} concurrent compiles (cache={use_cache}) on {num_threads} threads: {elapsed:.2f}s")
@@ -0,0 +1,80 @@
+# Sums a binary file of float64 values and counts lines of a text file through the
+# memory-mapped chunks of sigmastar.extio, reporting time and peak Python allocations,
+# which stay bounded by the chunk size instead of growing with the files.
+# Run from the repository root per `python benchmarks/extio.py [millions of values]`.
+import tempfile
+import tracemalloc
+import array
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+
+source = '''* "sigmastar.ext"
+* "sigmastar.extio"
+X [R]
+L [S]
+
+sum_file(path) SR {
+    total = 0.0
+    start = 0
+    n = R.count(path)
+    while N.lt(start, n) {
+        total = R.add(total, preduce(R.add, \\X R.chunk(path, start, 65536), 0.0))
+        start = N.add(start, 65536)
+    }
+    return total
+}
+
+matches(path, text) SSN {
+    found = 0
+    start = 0
+    n = S.count(path)
+    while N.lt(start, n) {
+        lines = \\L S.chunk(path, start, 10000)
+        i = 0
+        while N.lt(i, S.len(lines)) {
+            if S.eq(lines[i], text) {
+                found = N.add(found, 1)
+            }
+            i = N.add(i, 1)
+        }
+        start = N.add(start, 10000)
+    }
+    return found
+}
+'''
+
+
+def run(func, *args) -> tuple[float, float]:
+    start = time.perf_counter()
+    func(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()  # traced separately, since tracing slows down every allocation
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak
+
+
+if __name__ == "__main__":
+    millions = float(sys.argv[1]) if len(sys.argv) > 1 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "extio.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        module = import_module(path, use_cache=False)
+        values = os.path.join(tmp, "values.bin")
+        with open(values, "wb") as file:
+            array.array("d", range(int(millions*1e6))).tofile(file)
+        text = os.path.join(tmp, "lines.txt")
+        with open(text, "w", encoding="utf-8") as file:
+            file.writelines(f"record {i}\n" for i in range(int(millions*1e5)))
+        for name, func, args in (("sum_file", module.sum_file, (values,)), ("matches", module.matches, (text, "record 7"))):
+            seconds, peak = run(func, *args)
+            target = args[0]
+            print(f"{name:<10} {os.path.getsize(target)/1e6:>8.1f} MB file  {seconds:>8.3f}s  peak Python allocations {peak/1e6:>6.2f} MB")
+        from sigmastar import extio
+        for target in (values, text):
+            extio.close(target)
@@ -0,0 +1,47 @@
+# Runs a recursive pure function with and without memoization, and a function
+# that is called repeatedly with a few distinct arguments.
+# Run from the repository root per `python benchmarks/memo.py`.
+import tempfile
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+import sigmastar.memo
+
+source = '''* "sigmastar.ext"
+
+fib(n) NN {
+    if N.lt(n, 2) {
+        return n
+    }
+    return N.add(fib(N.sub(n, 1)), fib(N.sub(n, 2)))
+}
+
+score(x, y) RRR {
+    d = R.sub(x, y)
+    return R.div(R.mul(d, d), R.add(R.abs(x), 1.0))
+}
+'''
+
+
+def measure(path: str, size) -> tuple[float, float]:
+    sigmastar.memo.size = size
+    module = import_module(path, use_cache=False)
+    start = time.perf_counter()
+    module.fib(24)
+    recursive = time.perf_counter() - start
+    start = time.perf_counter()
+    module.score.map([float(i % 50) for i in range(200_000)], [1.0] * 200_000)
+    repeated = time.perf_counter() - start
+    return recursive, repeated
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "pure.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        for size in (0, 1024):
+            recursive, repeated = measure(path, size)
+            print(f"memo size {size}: fib(24) {recursive:.3f}s, 200k calls over 50 arguments {repeated:.3f}s")
@@ -0,0 +1,54 @@
+# Measures peak RSS while tokenizing, parsing, validating and generating code
+# for a large synthetic module. Python's own compile() of the result is excluded.
+# Run from the repository root per `python benchmarks/memory.py [other_checkout ...]`,
+# for example against `git worktree add /tmp/before HEAD~1` to compare before and after.
+import subprocess
+import tempfile
+import sys
+import os
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+function = '''
+f{i}(x, y) RRR {{
+    z = R.add(x, 1.5)
+    if R.lt(z, y) {{
+        z = R.mul(z, y)
+    }}
+    return R.sub(z, f{j}(z, y))
+}}
+'''
+
+measure = '''
+import resource, sys
+sys.path.insert(0, sys.argv[1])
+from sigmastar.parse import Parser
+from sigmastar.parser.tokenize import tokenize
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+Parser(tokenize(sys.argv[2]), 0).parse()
+after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(before, after)
+'''
+
+
+def source(num_functions: int) -> str:
+    text = '* "sigmastar.ext"\n\nf0(x, y) RRR {\n    return x\n}\n'
+    return text + "".join(function.format(i=i, j=i-1) for i in range(1, num_functions))
+
+
+def peak_rss(checkout: str, path: str) -> tuple[int, int]:
+    result = subprocess.run([sys.executable, "-c", measure, checkout, path], capture_output=True, text=True, check=True)
+    before, after = result.stdout.split()
+    return int(before), int(after)
+
+
+if __name__ == "__main__":
+    checkouts = [root] + sys.argv[1:]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "large.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source(50_000))
+        print(f"{'checkout':<40} {'startup KiB':>12} {'peak KiB':>12} {'compile KiB':>12}")
+        for checkout in checkouts:
+            before, after = peak_rss(checkout, path)
+            print(f"{checkout:<40} {before:>12} {after:>12} {after-before:>12}")
@@ -0,0 +1,50 @@
+# Compares pmap over a CPU-bound function with the same map on one process.
+# Speedups need as many cores as sigmastar.parallel.workers, default all of them.
+# Run from the repository root per `python benchmarks/parallel.py`.
+import tempfile
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+import sigmastar.parallel
+
+num_values = 400
+
+source = '''* "sigmastar.ext"
+X [R]
+
+heavy(x) RR {
+    i = 0
+    acc = 0.0
+    while N.lt(i, 20000) {
+        acc = R.add(acc, R.mul(x, 0.5))
+        i = N.add(i, 1)
+    }
+    return acc
+}
+
+run(xs) XX {
+    return pmap(heavy, xs)
+}
+'''
+
+
+def measure(module, values, workers):
+    sigmastar.parallel.workers = workers
+    start = time.perf_counter()
+    result = module.run(values)
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "heavy.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        module = import_module(path)
+        values = [float(i) for i in range(num_values)]
+        expected, sequential = measure(module, values, 1)
+        result, parallel = measure(module, values, None)
+        assert result == expected
+        print(f"pmap over {num_values} values: 1 process {sequential:.2f}s, {os.cpu_count()} processes {parallel:.2f}s")
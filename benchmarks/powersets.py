@@ -0,0 +1,59 @@
+# Compares the memory of a million-element [R] powerset as a list of floats and as the
+# typed buffer that sigmastar keeps, and times reductions over list, array and NumPy inputs.
+# Run from the repository root per `python benchmarks/powersets.py`.
+import tempfile
+import tracemalloc
+import array
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+
+source = '''* "sigmastar.ext"
+X [R]
+
+total(xs) XR {
+    return preduce(R.add, xs, 0.0)
+}
+
+middle(xs, i) XNR {
+    return xs[i]
+}
+'''
+
+size = 1_000_000
+
+
+def allocated(make) -> int:
+    tracemalloc.start()
+    value = make()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del value
+    return current
+
+
+def seconds(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "powersets.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        module = import_module(path, use_cache=False)
+    print(f"list of {size} floats:  {allocated(lambda: [float(i) for i in range(size)])/1e6:>8.1f} MB")
+    print(f"array('d') of {size}:   {allocated(lambda: array.array('d', range(size)))/1e6:>8.1f} MB")
+    inputs = {"list": [float(i) for i in range(size)], "array": array.array("d", range(size))}
+    try:
+        import numpy
+        inputs["numpy"] = numpy.arange(size, dtype=numpy.float64)
+    except ImportError:
+        pass
+    for name, values in inputs.items():
+        print(f"total() of {name:<6} {seconds(module.total, values):>8.4f}s  "
+              f"indexing {seconds(module.middle, values, size//2)*1e6:>8.1f}us")
@@ -0,0 +1,82 @@
+# Sums the squares of the small values of a binary float64 file once through a list
+# powerset and once through a lazy smap/sfilter stream pipeline, reporting time and
+# peak Python allocations, which grow with the file for the first but not the second.
+# Run from the repository root per `python benchmarks/streams.py [millions of values]`.
+import tempfile
+import tracemalloc
+import array
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+
+source = '''* "sigmastar.ext"
+* "sigmastar.extio"
+X [R]
+Q <R>
+
+square(x) RR {
+    return R.mul(x, x)
+}
+
+small(x) RB {
+    return R.lt(x, 1000.0)
+}
+
+total(xs) QR {
+    s = 0.0
+    while smore(xs) {
+        s = R.add(s, snext(xs))
+    }
+    return s
+}
+
+listed(path) SR {
+    xs = scollect(\\Q R.stream(path))
+    s = 0.0
+    i = 0
+    while N.lt(i, R.len(xs)) {
+        if small(xs[i]) {
+            s = R.add(s, square(xs[i]))
+        }
+        i = N.add(i, 1)
+    }
+    return s
+}
+
+streamed(path) SR {
+    return total(smap(square, sfilter(small, \\Q R.stream(path))))
+}
+'''
+
+
+def run(func, *args) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()  # traced separately, since tracing slows down every allocation
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result, seconds, peak
+
+
+if __name__ == "__main__":
+    millions = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "streams.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        module = import_module(path, use_cache=False)
+        values = os.path.join(tmp, "values.bin")
+        with open(values, "wb") as file:
+            array.array("d", (i % 2000 for i in range(int(millions*1e6)))).tofile(file)
+        results = set()
+        for name in ("listed", "streamed"):
+            result, seconds, peak = run(getattr(module, name), values)
+            results.add(result)
+            print(f"{name:<10} {os.path.getsize(values)/1e6:>8.1f} MB file  {seconds:>8.3f}s  peak Python allocations {peak/1e6:>6.2f} MB")
+        from sigmastar import extio
+        extio.close(values)
+        assert len(results) == 1, "Both pipelines should compute the same sum"
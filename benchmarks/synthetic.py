@@ -0,0 +1,84 @@
+# Generates synthetic .st programs for compiler benchmarks, like
+# `python benchmarks/synthetic.py 10000 > big.st` from the repository root.
+# Programs mix plain functions that call earlier ones, deeply nested if/while
+# bodies, long curry chains cast to declared {type} primitives, and powersets.
+import string
+import random
+import sys
+
+builtin_letters = set("RNSBAM")
+letters = [c for c in string.ascii_letters if c not in builtin_letters]  # primitive names are single letters
+
+
+def _plain(i: int, rng: random.Random) -> str:
+    callee = "R.add"
+    if i:
+        target = rng.randrange(i)
+        callee = f"f{target - (target % 4 == 3)}"  # any earlier function that is not over a powerset
+    return (f"f{i}(x, y) RRR {{\n"
+            f"    z = R.add(x, {rng.random():.3f})\n"
+            f"    w = {callee}(z, y)\n"
+            f"    return R.mul(w, y)\n"
+            f"}}\n")
+
+
+def _nested(i: int, depth: int) -> str:
+    lines = [f"f{i}(x, y) RRR {{", "    z = x"]
+    for level in range(depth):
+        indent = "    "*(level+1)
+        keyword = "while" if level % 2 else "if"
+        lines.append(f"{indent}{keyword} R.lt(z, {float(level)}) {{")
+        lines.append(f"{indent}    z = R.add(z, 1.0)")
+    for level in reversed(range(depth)):
+        lines.append("    "*(level+1)+"}")
+    lines.append("    return R.add(z, y)")
+    lines.append("}")
+    return "\n".join(lines)+"\n"
+
+
+def _chain(i: int, length: int, declared: str) -> str:
+    # sum{length} takes length+1 arguments, so currying length of them leaves a declared {RR}
+    values = "|".join(f"R.add(x, {k}.0)" if k % 3 == 2 else "x" for k in range(length))
+    return (f"f{i}(x, y) RRR {{\n"
+            f"    g = \\{declared} {values}|sum{length}\n"
+            f"    return R.add(g(y), x)\n"
+            f"}}\n")
+
+
+def _powerset(i: int, declared: str) -> str:
+    return (f"f{i}(xs, y) {declared}RR {{\n"
+            f"    return preduce(R.add, xs, y)\n"
+            f"}}\n")
+
+
+def generate(functions: int, depth: int = 8, chain: int = 16, declarations: int = len(letters), seed: int = 0) -> str:
+    """A valid .st program with the given number of functions f0..f{functions-1}, where every
+    fourth one reduces a powerset and the rest have signature RRR. Declarations are capped at the single letters that are not builtin primitives."""
+    rng = random.Random(seed)
+    declarations = max(2, min(declarations, len(letters)))
+    out = ['* "sigmastar.ext"\n']
+    function_types = letters[:declarations//2]
+    powersets = letters[declarations//2:declarations]
+    out.extend(f"{letter} {{RR}}\n" for letter in function_types)
+    out.extend(f"{letter} [R]\n" for letter in powersets)
+    args = ", ".join(f"a{k}" for k in range(chain+1))
+    body = f"a{chain}"
+    for k in reversed(range(chain)):
+        body = f"R.add(a{k}, {body})"
+    out.append(f"sum{chain}({args}) R{chain+2} {{\n    return {body}\n}}\n")
+    for i in range(functions):
+        kind = i % 4
+        if kind == 0:
+            out.append(_plain(i, rng))
+        elif kind == 1:
+            out.append(_nested(i, depth))
+        elif kind == 2:
+            out.append(_chain(i, chain, function_types[i % len(function_types)]))
+        else:
+            out.append(_powerset(i, powersets[i % len(powersets)]))
+    out.append("main() {\n    R.print(f0(1.0, 2.0))\n}\n")
+    return "".join(out)
+
+
+if __name__ == "__main__":
+    sys.stdout.write(generate(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
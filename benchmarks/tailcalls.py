@@ -0,0 +1,43 @@
+# Times a tail-recursive sum against the same sum written as a while loop, for depths
+# far beyond Python's recursion limit, since tail self-calls compile into loops.
+# Run from the repository root per `python benchmarks/tailcalls.py [depth]`.
+import tempfile
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar import import_module
+
+source = '''* "sigmastar.ext"
+
+recursive(n, acc) NNN {
+    if N.le(n, 0) {
+        return acc
+    }
+    return recursive(N.sub(n, 1), N.add(acc, n))
+}
+
+looped(n, acc) NNN {
+    while N.gt(n, 0) {
+        acc = N.add(acc, n)
+        n = N.sub(n, 1)
+    }
+    return acc
+}
+'''
+
+
+if __name__ == "__main__":
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tailcalls.st")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(source)
+        for optimize in (0, 1):
+            module = import_module(path, use_cache=False, optimize=optimize)
+            for name in ("recursive", "looped"):
+                start = time.perf_counter()
+                result = getattr(module, name)(depth, 0)
+                seconds = time.perf_counter() - start
+                assert result == depth*(depth+1)//2
+                print(f"-O{optimize} {name:<10} depth {depth:>9}  {seconds:>8.3f}s")
@@ -0,0 +1,39 @@
+# Measures tokenizer throughput on generated sources from 1k to 1M tokens.
+# Run from the repository root per `python benchmarks/tokenizer.py`.
+# Time per token should stay roughly constant as the input grows.
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from sigmastar.parser.tokenize import scan
+
+# 24 tokens per function, plus a dotted name and a comment
+function = '''
+f{i}(x, y) RRR {{  # generated
+    z = R.add(x, 1.5e3)
+    return R.mul(z, y)
+}}
+'''
+
+
+def source(num_tokens: int) -> str:
+    per_function = 24
+    return "".join(function.format(i=i) for i in range(num_tokens // per_function))
+
+
+def measure(num_tokens: int, repeats: int = 3) -> tuple[int, float]:
+    text = source(num_tokens)
+    best = float("inf")
+    count = 0
+    for _ in range(repeats):
+        start = time.perf_counter()
+        count = sum(1 for _ in scan(text, "bench.st"))
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+if __name__ == "__main__":
+    print(f"{'tokens':>10} {'seconds':>10} {'ns/token':>10}")
+    for num_tokens in (1_000, 10_000, 100_000, 1_000_000):
+        count, seconds = measure(num_tokens)
+        print(f"{count:>10} {seconds:>10.4f} {seconds/count*1e9:>10.1f}")
@@ -0,0 +1,36 @@
+# Compares the scalar and the NumPy-vectorized versions of example/module.st's
+# compare and add_point over many rows. Requires numpy.
+# Run from the repository root per `python benchmarks/vectorize.py`.
+import time
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import numpy as np
+from sigmastar import import_module
+
+num_rows = 1_000_000
+num_scalar_rows = 50_000  # the scalar loop is extrapolated from fewer rows
+
+
+def scalar(func, columns, rows):
+    start = time.perf_counter()
+    for row in zip(*[column[:rows].tolist() for column in columns]):
+        func(*row)
+    return (time.perf_counter() - start) * num_rows / rows
+
+
+def vectorized(func, columns):
+    start = time.perf_counter()
+    func(*columns)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    module = import_module("example/module.st", use_cache=False, vectorize=True)
+    rng = np.random.default_rng(0)
+    x, y = rng.normal(size=num_rows) * 10, rng.normal(size=num_rows) * 10
+    for name, columns in (("compare", (x, y)), ("add_point", (x, y, y, x))):
+        func = getattr(module, name)
+        slow = scalar(func, columns, num_scalar_rows)
+        fast = vectorized(func, columns)
+        print(f"{name} over {num_rows} rows: scalar {slow:.2f}s, vectorized {fast:.3f}s ({slow/fast:.0f}x)")
@@ -1 +1,7 @@
-from sigmastar.parse import import_module
+from sigmastar.parse import import_module, batch, run_main
+from sigmastar.parser.diagnostics import CompileError
+from sigmastar.integration import CompilerSession
+from sigmastar.importer import install, uninstall
+from sigmastar.memo import pure
+from sigmastar.profiler import Profiler
+from sigmastar.stats import CompileStats
@@ -1,9 +1,74 @@
-from sigmastar.parse import import_module
+from sigmastar.parser.diagnostics import CompileError
+from sigmastar.parse import import_module, run_main
+from sigmastar.parser.vectorize import VectorizeWarning
+from sigmastar.parser.tailcalls import TailCallWarning
+from sigmastar.importer import install
+import argparse
+import warnings
 import sys
 
-try: 
-    main_module = import_module(sys.argv[1])
-    main_module.main()
-except Exception as e:
-    print(str(e))
 
+def _imports_st(path: str) -> bool:
+    """Whether a file imports .st modules, which only the import hook finds."""
+    from sigmastar.build import scan, resolve
+    return any(resolve(name, sys.path) for name in scan(path))
+
+
+def main(argv: list[str]):
+    if argv and argv[0] == "build":
+        from sigmastar.build import main as build
+        return build(argv[1:])
+    if argv and argv[0] == "bench":
+        from sigmastar.bench import main as bench
+        return bench(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="python -m sigmastar", description="Run the main() function of a .st file")
+    parser.add_argument("path", help="the .st file to run")
+    parser.add_argument("--all-errors", action="store_true", help="print every compilation error instead of the first one")
+    parser.add_argument("-O", dest="optimize", type=int, choices=(0, 1, 2), default=0, help="optimization level: -O1 inlines ext builtins, folds constants and removes dead branches, -O2 also inlines small functions")
+    parser.add_argument("--vectorize", action="store_true", help="let functions over R, N and B also run elementwise on NumPy arrays")
+    parser.add_argument("--lazy", action="store_true", help="only compile main() and what it uses up front, and other functions once accessed")
+    parser.add_argument("--stats", action="store_true", help="print the time of each compiler phase and the size of the program to stderr")
+    parser.add_argument("--profile", action="store_true", help="print calls, times and hot lines of sigmastar functions to stderr")
+    parser.add_argument("--profile-output", metavar="FILE", help="also write the profile as pstats data, or as speedscope JSON if FILE ends in .json")
+    args = parser.parse_args(argv)
+
+    try:
+        if _imports_st(args.path):
+            install(args.optimize, args.lazy)
+        with warnings.catch_warnings(record=True) as reports:
+            warnings.simplefilter("always", VectorizeWarning)
+            warnings.simplefilter("always", TailCallWarning)
+            main_module, stats = import_module(args.path, optimize=args.optimize, vectorize=args.vectorize, stats=True, entries=("main",) if args.lazy else None)
+        for report in reports:
+            if issubclass(report.category, (VectorizeWarning, TailCallWarning)):
+                print(report.message, file=sys.stderr)
+            else:
+                warnings.showwarning(report.message, report.category, report.filename, report.lineno)
+    except CompileError as e:
+        shown = e.diagnostics if args.all_errors else e.diagnostics[:1]
+        for diagnostic in shown:
+            print(diagnostic.format(color=sys.stdout.isatty()))
+        if len(shown) < len(e.diagnostics):
+            print(f"({len(e.diagnostics)-len(shown)} more errors, use --all-errors to show them)")
+        return 1
+    except OSError as e:
+        print(e)
+        return 1
+    if args.stats:
+        print(stats.report(), file=sys.stderr)
+    if not args.profile and not args.profile_output:
+        run_main(main_module)
+        return 0
+    from sigmastar.profiler import Profiler
+    with Profiler() as profiler:
+        run_main(main_module)
+    print(profiler.report(), file=sys.stderr)
+    if args.profile_output:
+        profiler.dump(args.profile_output)
+    return 0
+
+
+# worker processes of pmap and preduce may import this module without running it
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,145 @@
+# Benchmark runner, run per `python -m sigmastar bench <file.st> [--json out.json]`.
+# Every function named bench_* without arguments is warmed up and then timed over
+# repetitions of enough calls each to make timer resolution negligible, through the
+# direct entry that compiled code calls, next to the median of its variadic wrapper.
+from sigmastar.parse import import_module
+from sigmastar.importer import install
+from sigmastar.parser import function
+from sigmastar import memo
+import statistics
+import subprocess
+import argparse
+import platform
+import json
+import time
+import sys
+import os
+
+min_repetition_time = 0.05  # seconds that each timed repetition should last at least
+
+
+def discover(module) -> list[str]:
+    return [name for name, (args, _, _, _) in module.__sigmastar__.items() if name.startswith("bench_") and not args]
+
+
+def calibrate(func) -> int:
+    """Number of calls per repetition, doubled until a repetition lasts min_repetition_time."""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - start >= min_repetition_time:
+            return loops
+        loops *= 2
+
+
+def measure(func, warmup: int, repeat: int) -> dict:
+    for _ in range(warmup):
+        func()
+    loops = calibrate(func)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        times.append((time.perf_counter() - start) / loops)
+    times.sort()
+    median = statistics.median(times)
+    return {
+        "min": times[0],
+        "median": median,
+        "p95": times[min(len(times)-1, round(0.95*(len(times)-1)))],
+        "calls_per_second": 1/median if median else float("inf"),
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def _commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, timeout=5,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def run(path: str, warmup: int = 3, repeat: int = 20, optimize: int = 0, variadic: bool = True,
+        memoize: bool = True, only: str | None = None, log=print) -> dict:
+    """Benchmarks the bench_* functions of a .st file and returns the results in their JSON layout."""
+    previous = function.variadic_returns, memo.size
+    function.variadic_returns = variadic
+    if not memoize:
+        memo.size = 0
+    try:
+        install(optimize)
+        module = import_module(path, use_cache=False, optimize=optimize)
+        results = dict()
+        for name in discover(module):
+            if only and only not in name:
+                continue
+            # compiled code calls the direct entry, while Python callers go through the variadic wrapper
+            entry = module.__sigmastar__[name][3]
+            results[name] = measure(getattr(module, entry), warmup, repeat)
+            if entry != name:
+                results[name]["wrapper_median"] = measure(getattr(module, name), warmup, repeat)["median"]
+            log(format_result(name, results[name]))
+    finally:
+        function.variadic_returns, memo.size = previous
+    return {
+        "file": path,
+        "mode": {"optimize": optimize, "variadic_returns": variadic, "memoize": memoize and memo.size != 0},
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def _unit(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds/scale:.2f}{unit}"
+    return f"{seconds/1e-9:.0f}ns"
+
+
+def format_result(name: str, result: dict, baseline: dict | None = None) -> str:
+    line = (f"{name:<32} min {_unit(result['min']):>9}  median {_unit(result['median']):>9}"
+            f"  p95 {_unit(result['p95']):>9}  {result['calls_per_second']:>12,.0f} calls/s")
+    if "wrapper_median" in result:
+        line += f"  wrapper {_unit(result['wrapper_median']):>9}"
+    if baseline:
+        line += f"  {baseline['median']/result['median']:.2f}x vs baseline"
+    return line
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="python -m sigmastar bench", description="Time the bench_* functions of a .st file")
+    parser.add_argument("path", help="the .st file with bench_* functions")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed calls before measuring")
+    parser.add_argument("--repeat", type=int, default=20, help="timed repetitions")
+    parser.add_argument("-k", dest="only", help="only run benchmarks whose name contains this")
+    parser.add_argument("-O", dest="optimize", type=int, choices=(0, 1, 2), default=0, help="optimization level, like -O1 or -O2")
+    parser.add_argument("--no-variadic-returns", action="store_true", help="compile without the generic Python entry points")
+    parser.add_argument("--no-memoize", action="store_true", help="disable memoization of pure functions even if sigmastar.memo.size enables it")
+    parser.add_argument("--json", metavar="FILE", help="write the results to FILE")
+    parser.add_argument("--compare", metavar="FILE", help="show speedups against results written earlier with --json")
+    args = parser.parse_args(argv)
+
+    baseline = dict()
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+    log = print if not baseline else (lambda line: None)
+    report = run(args.path, args.warmup, args.repeat, args.optimize, not args.no_variadic_returns, not args.no_memoize, args.only, log)
+    if baseline:
+        for name, result in report["results"].items():
+            print(format_result(name, result, baseline.get(name)))
+    if not report["results"]:
+        print(f"No bench_* functions without arguments in {args.path}", file=sys.stderr)
+        return 1
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return 0
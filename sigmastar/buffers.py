@@ -0,0 +1,38 @@
+# Runtime of [powerset] values over R, N or B, which are kept in typed buffers instead
+# of lists of boxed objects. array.array values and 1-d buffers of a matching format,
+# like NumPy arrays, are used as they are (the latter through a memoryview), and other
+# iterables, including <stream> values, are copied into an array.array once.
+from array import array
+
+typecodes = {"R": "d", "N": "q", "B": "b"}  # array.array storage of each element primitive
+formats = {"R": "df", "N": "bBhHiIlLqQn", "B": "?bB"}  # buffer formats that index to numbers of the element's kind
+
+
+def coerce(x, letter: str):
+    if isinstance(x, array):
+        if x.typecode in formats[letter]:
+            return x
+        return array(typecodes[letter], x)
+    if isinstance(x, (list, tuple, range)):
+        return array(typecodes[letter], x)
+    try:
+        view = x if isinstance(x, memoryview) else memoryview(x)
+    except TypeError:
+        if not hasattr(x, "__iter__") or isinstance(x, str):
+            raise Exception(f"Expected a list or buffer for a [{letter}] powerset but got {x.__class__.__name__}") from None
+        return array(typecodes[letter], x)
+    if view.ndim == 1 and view.format in formats[letter]:
+        return view
+    return array(typecodes[letter], x)
+
+
+def powerset_R(x):
+    return coerce(x, "R")
+
+
+def powerset_N(x):
+    return coerce(x, "N")
+
+
+def powerset_B(x):
+    return coerce(x, "B")
@@ -0,0 +1,142 @@
+# Parallel compilation of whole source trees, run per `python -m sigmastar build <dir>`.
+# Modules are compiled into the persistent cache once all modules they import are built.
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from sigmastar.parser.tokenize import tokenize
+from sigmastar.parse import compile_module
+from sigmastar.importer import install, extension
+from sigmastar import cache
+import argparse
+import sys
+import os
+
+
+def discover(root: str) -> list[str]:
+    found = []
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name != "__pycache__")
+        found.extend(os.path.join(directory, name) for name in sorted(filenames) if name.endswith(extension))
+    return found
+
+
+def scan(path: str) -> list[str]:
+    """Returns the modules imported by a file without parsing declarations or function bodies."""
+    tokens = tokenize(path)
+    imports = []
+    pos = 0
+    while pos + 1 < len(tokens):
+        key, value = str(tokens[pos]), str(tokens[pos+1])
+        if len(value) >= 2 and value[0] == "\"" and value[-1] == "\"":
+            imports.append(value[1:-1])
+            pos += 2
+            continue
+        if value not in ("{", "[", "<"):
+            while pos < len(tokens) and str(tokens[pos]) != "{":
+                pos += 1
+        # skip the bracketed declaration or function body
+        depth = 0
+        while pos < len(tokens):
+            token = str(tokens[pos])
+            pos += 1
+            if token in ("{", "[", "<"):
+                depth += 1
+            elif token in ("}", "]", ">"):
+                depth -= 1
+                if depth == 0:
+                    break
+    return imports
+
+
+def resolve(name: str, roots: list[str]) -> str | None:
+    for root in roots:
+        base = os.path.join(root or os.getcwd(), *name.split("."))
+        for candidate in (base + extension, os.path.join(base, "__init__" + extension)):
+            if os.path.isfile(candidate):
+                return os.path.abspath(candidate)
+    return None
+
+
+def dependencies(paths: list[str], roots: list[str]) -> dict[str, list[str]]:
+    """Maps each file to the files of the tree it imports. Imported modules also
+    share their {type} and [powerset] declarations, so these edges cover both."""
+    known = set(paths)
+    graph = {}
+    for path in paths:
+        imports = scan(path)
+        deps = [resolve(name, roots) for name in imports]
+        graph[path] = [dep for dep in deps if dep in known and dep != path]
+    return graph
+
+
+def _compile(path: str, optimize: int):
+    install(optimize)
+    with open(path, "rb") as file:
+        source = file.read()
+    code, imports = compile_module(path, source.decode("utf-8"), optimize=optimize)
+    cache.store(path, source, imports, code, optimize)
+    return path
+
+
+def _is_fresh(path: str, optimize: int) -> bool:
+    with open(path, "rb") as file:
+        source = file.read()
+    return cache.load(path, source, optimize) is not None
+
+
+def build(root: str, jobs: int | None = None, force: bool = False, optimize: int = 0, log=print):
+    """Compiles every .st file under root and returns the sets of built, fresh and failed files."""
+    install(optimize)
+    roots = [os.path.abspath(root), os.path.dirname(os.path.abspath(root))] + sys.path
+    paths = [os.path.abspath(path) for path in discover(root)]
+    graph = dependencies(paths, roots)
+    pending = set(paths)
+    built, fresh, failed = set(), set(), set()
+    with ProcessPoolExecutor(jobs) as pool:
+        running = {}
+        while pending or running:
+            ready = True
+            while ready:
+                ready = False
+                for path in sorted(pending):
+                    deps = graph[path]
+                    if any(dep in failed for dep in deps):
+                        log(f"skipped {path}: a dependency failed to build")
+                        failed.add(path)
+                    elif all(dep in built or dep in fresh for dep in deps):
+                        if not force and not any(dep in built for dep in deps) and _is_fresh(path, optimize):
+                            fresh.add(path)
+                        else:
+                            running[pool.submit(_compile, path, optimize)] = path
+                    else:
+                        continue
+                    pending.discard(path)
+                    ready = True
+            if not running:
+                if pending:  # everything left waits on a cycle
+                    for path in sorted(pending):
+                        log(f"skipped {path}: circular import")
+                    failed.update(pending)
+                    pending.clear()
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                path = running.pop(future)
+                try:
+                    future.result()
+                    built.add(path)
+                    log(f"built {path}")
+                except BaseException as e:
+                    failed.add(path)
+                    log(f"failed {path}: {e}")
+    log(f"{len(built)} built, {len(fresh)} up to date, {len(failed)} failed")
+    return built, fresh, failed
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="python -m sigmastar build", description="Compile all .st files under a directory")
+    parser.add_argument("root", help="directory to search for .st files")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="rebuild modules even if they are up to date")
+    parser.add_argument("-O", dest="optimize", type=int, choices=(0, 1, 2), default=0, help="optimization level, like -O1 or -O2")
+    args = parser.parse_args(argv)
+    _, _, failed = build(args.root, args.jobs, args.force, args.optimize)
+    return 1 if failed else 0
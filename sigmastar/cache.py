@@ -0,0 +1,88 @@
+# Persistent compilation cache for sigmastar modules, stored next to
+# the sources like __pycache__. Entries are keyed by the source hash,
+# the hashes of imported Python modules and a hash of the compiler sources.
+from sigmastar.parser import function
+import importlib.util
+import hashlib
+import marshal
+import tempfile
+import sys
+import os
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _compiler_digest() -> str:
+    """Hash of every source file of the compiler and its runtime, so that any change to them invalidates entries."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    paths = sorted(os.path.join(directory, name) for directory, dirs, names in os.walk(root)
+                   if "__pycache__" not in directory for name in names if name.endswith(".py"))
+    hasher = hashlib.sha256()
+    for path in paths:
+        hasher.update(os.path.relpath(path, root).encode("utf-8"))
+        with open(path, "rb") as file:
+            hasher.update(digest(file.read()).encode("ascii"))
+    return hasher.hexdigest()[:16]
+
+
+version = _compiler_digest()
+
+
+def module_digest(name: str) -> str:
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return ""
+    if not spec.has_location or not spec.origin:
+        return str(spec.origin)
+    with open(spec.origin, "rb") as file:
+        return digest(file.read())
+
+
+def cache_path(path: str, optimize: int = 0, vectorize: bool = False, entries: tuple[str, ...] | None = None) -> str:
+    base = os.path.splitext(os.path.basename(path))[0]
+    tag = sys.implementation.cache_tag + (f".opt-{optimize}" if optimize else "") + (".vec" if vectorize else "")
+    if entries is not None:
+        tag += ".lazy" + "".join("-"+name for name in entries)
+    if not function.variadic_returns:
+        tag += ".novariadic"
+    return os.path.join(os.path.dirname(path), "__pycache__", f"{base}.{tag}.stc")
+
+
+def load(path: str, source: bytes, optimize: int = 0, vectorize: bool = False, entries: tuple[str, ...] | None = None):
+    """Returns the cached code object for the source, or None if missing or stale."""
+    try:
+        with open(cache_path(path, optimize, vectorize, entries), "rb") as file:
+            entry = marshal.load(file)
+        magic, entry_version, source_digest, deps, code = entry
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if magic != importlib.util.MAGIC_NUMBER or entry_version != version:
+        return None
+    if source_digest != digest(source):
+        return None
+    for name, dep_digest in deps:
+        try:
+            if module_digest(name) != dep_digest:
+                return None
+        except (OSError, ImportError, ValueError):
+            return None
+    return code
+
+
+def store(path: str, source: bytes, imports: list[str], code, optimize: int = 0, vectorize: bool = False, entries: tuple[str, ...] | None = None):
+    deps = tuple((name, module_digest(name)) for name in imports)
+    entry = (importlib.util.MAGIC_NUMBER, version, digest(source), deps, code)
+    target = cache_path(path, optimize, vectorize, entries)
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                marshal.dump(entry, file)
+            os.replace(tmp, target)
+        except BaseException:
+            os.remove(tmp)
+            raise
+    except OSError:
+        pass  # like __pycache__, an unwritable cache is not an error
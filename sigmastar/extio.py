@@ -0,0 +1,177 @@
+# File input helpers that can be imported in sigmastar files with `* "sigmastar.extio"`.
+# Files are memory-mapped once per path, so reading only pages in what is indexed:
+# binary files of float64 or int64 values become [R] or [N] powersets viewing the
+# mapping, and newline-delimited text becomes [S] record views decoded per access.
+# Mappings are redone when a file's modification time or size changes.
+# Chunks cover a range of values or lines, which lets while loops walk files of any
+# size while only one chunk is referenced at a time, and streams yield one at a time.
+from collections.abc import Sequence, Iterator
+from array import array
+import threading
+import mmap
+import os
+
+window = 1 << 20  # bytes scanned at a time when counting or seeking lines
+checkpoint = 1 << 16  # lines between remembered byte offsets of text files
+
+_files: dict[str, "_Mapped"] = dict()
+_lock = threading.Lock()
+
+
+class _Mapped:
+    __slots__ = ("map", "size", "stamp", "checkpoints", "lines")
+
+    def __init__(self, path: str, stamp: tuple[int, int]):
+        self.stamp = stamp  # (mtime, size) when mapped, which rewrites of the file change
+        with open(path, "rb") as file:
+            self.size = file.seek(0, 2)
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.checkpoints = array("q", [0])  # byte offset of every checkpoint-th line
+        self.lines: int | None = None
+
+    def values(self, typecode: str) -> memoryview:
+        itemsize = array(typecode).itemsize
+        return memoryview(self.map)[:self.size - self.size % itemsize].cast(typecode)
+
+    def count(self) -> int:
+        if self.lines is None:
+            newlines = sum(self.map[i:i+window].count(b"\n") for i in range(0, self.size, window))
+            self.lines = newlines + (1 if self.size and self.map[self.size-1:self.size] != b"\n" else 0)
+        return self.lines
+
+    def seek(self, line: int) -> int:
+        """Byte offset where a line starts, scanning forward from the closest checkpoint."""
+        known = min(line // checkpoint, len(self.checkpoints)-1)
+        pos = self.checkpoints[known]
+        current = known*checkpoint
+        while current < line and pos < self.size:
+            end = self.map.find(b"\n", pos)
+            pos = self.size if end < 0 else end+1
+            current += 1
+            if current % checkpoint == 0 and current // checkpoint == len(self.checkpoints):
+                self.checkpoints.append(pos)
+        return pos
+
+    def records(self, start: int, count: int) -> "Records":
+        pos = self.seek(max(0, start))
+        offsets = array("q", [pos])
+        while len(offsets) <= count and pos < self.size:
+            end = self.map.find(b"\n", pos)
+            pos = self.size if end < 0 else end+1
+            offsets.append(pos)
+        return Records(self.map, offsets)
+
+
+class Records(Sequence):
+    """Lines of a memory-mapped text file between remembered offsets, decoded when indexed."""
+    __slots__ = ("map", "offsets")
+
+    def __init__(self, map, offsets: array):
+        self.map = map
+        self.offsets = offsets  # start of each line, then the end of the last one
+
+    def __len__(self):
+        return len(self.offsets)-1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            return Records(self.map, self.offsets[start:max(start, stop)+1])
+        offsets = self.offsets
+        if i < 0:
+            i += len(offsets)-1
+        if not 0 <= i < len(offsets)-1:
+            raise IndexError("record index out of range")
+        line = self.map[offsets[i]:offsets[i+1]]
+        return line.rstrip(b"\n").rstrip(b"\r").decode("utf-8")
+
+    def __repr__(self):
+        return f"Records({len(self)} lines)"
+
+
+class Lines(Sequence):
+    """All lines of a memory-mapped text file, of which one chunk of offsets is kept at a time."""
+    __slots__ = ("mapped", "start", "chunk")
+
+    def __init__(self, mapped: _Mapped):
+        self.mapped = mapped
+        self.start = 0
+        self.chunk: Records | None = None
+
+    def __len__(self):
+        return self.mapped.count()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            return self.mapped.records(start, max(0, stop-start))
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("record index out of range")
+        if self.chunk is None or not 0 <= i-self.start < len(self.chunk):
+            self.start = i - i % checkpoint
+            self.chunk = self.mapped.records(self.start, checkpoint)
+        return self.chunk[i-self.start]
+
+    def __repr__(self):
+        return f"Lines({len(self)} lines)"
+
+
+def _stamp(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _mapped(path: str) -> _Mapped:
+    stamp = _stamp(path)
+    mapped = _files.get(path)
+    if mapped is None or mapped.stamp != stamp:
+        with _lock:
+            mapped = _files.get(path)
+            if mapped is None or mapped.stamp != stamp:
+                if mapped is not None:
+                    _unmap(mapped)  # the file was rewritten since it was mapped
+                mapped = _files[path] = _Mapped(path, stamp)
+    return mapped
+
+
+def _unmap(mapped: _Mapped) -> bool:
+    if not mapped.size:
+        return False
+    try:
+        mapped.map.close()
+    except BufferError:
+        pass  # views are still alive, and the mapping goes away with them
+    return True
+
+
+def close(path: str) -> bool:
+    """Forgets the mapping of a file, which is unmapped once no powerset views it."""
+    mapped = _files.pop(path, None)
+    return mapped is not None and _unmap(mapped)
+
+
+def R__file(path: str) -> Sequence[float]: return _mapped(path).values("d")
+def R__count(path: str) -> int: return len(_mapped(path).values("d"))
+def R__chunk(path: str, start: int, count: int) -> Sequence[float]: return _mapped(path).values("d")[max(0, start):max(0, start)+max(0, count)]
+def R__len(xs: Sequence[float]) -> int: return len(xs)
+def R__stream(path: str) -> Iterator[float]: return iter(_mapped(path).values("d"))
+
+def N__file(path: str) -> Sequence[int]: return _mapped(path).values("q")
+def N__count(path: str) -> int: return len(_mapped(path).values("q"))
+def N__chunk(path: str, start: int, count: int) -> Sequence[int]: return _mapped(path).values("q")[max(0, start):max(0, start)+max(0, count)]
+def N__len(xs: Sequence[int]) -> int: return len(xs)
+def N__stream(path: str) -> Iterator[int]: return iter(_mapped(path).values("q"))
+
+def S__file(path: str) -> Sequence[str]: return Lines(_mapped(path))
+def S__count(path: str) -> int: return _mapped(path).count()
+def S__chunk(path: str, start: int, count: int) -> Sequence[str]: return _mapped(path).records(start, max(0, count))
+def S__len(xs: Sequence[str]) -> int: return len(xs)
+def S__stream(path: str) -> Iterator[str]:
+    for start in range(0, _mapped(path).count(), checkpoint):
+        yield from _mapped(path).records(start, checkpoint)
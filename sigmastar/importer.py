@@ -0,0 +1,68 @@
+# Import hook that lets .st files on sys.path be imported like Python modules,
+# e.g., `import example.module` after calling `sigmastar.install()`.
+import importlib.abc
+import importlib.util
+import sys
+import os
+from sigmastar.parse import load_code
+from sigmastar import cache
+
+extension = ".st"
+optimize = 0  # optimization level of modules compiled by the hook, set through install()
+lazy = False  # compile functions of imported modules on first access, set through install()
+
+
+def _entries():
+    return () if lazy else None
+
+
+class SigmastarLoader(importlib.abc.FileLoader, importlib.abc.InspectLoader):
+    def is_package(self, fullname):
+        return os.path.basename(self.path) == "__init__" + extension
+
+    def get_source(self, fullname):
+        return self.get_data(self.path).decode("utf-8")
+
+    def get_code(self, fullname):
+        return load_code(self.path, self.get_data(self.path), optimize=optimize, entries=_entries())
+
+
+class SigmastarFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path=None, target=None):
+        name = fullname.rpartition(".")[2]
+        for entry in (sys.path if path is None else path):
+            entry = entry or os.getcwd()
+            package = os.path.join(entry, name)
+            init = os.path.join(package, "__init__" + extension)
+            if os.path.isfile(init):
+                return self._spec(fullname, init, [package])
+            module = package + extension
+            if os.path.isfile(module):
+                return self._spec(fullname, module, None)
+        return None
+
+    def _spec(self, fullname, path, search_locations):
+        loader = SigmastarLoader(fullname, path)
+        spec = importlib.util.spec_from_file_location(
+            fullname, path, loader=loader, submodule_search_locations=search_locations)
+        spec.cached = cache.cache_path(path, optimize, entries=_entries())
+        return spec
+
+
+finder = SigmastarFinder()
+
+
+def install(level: int = 0, lazy_functions: bool = False):
+    """Lets the import system find .st files after Python modules, so that same-named
+    .py helpers next to them keep resolving to Python.
+    With lazy_functions, their functions are validated and compiled on first access."""
+    global optimize, lazy
+    optimize = level
+    lazy = lazy_functions
+    if finder not in sys.meta_path:
+        sys.meta_path.append(finder)
+
+
+def uninstall():
+    if finder in sys.meta_path:
+        sys.meta_path.remove(finder)
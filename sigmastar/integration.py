@@ -1,50 +1,192 @@
-from sigmastar.parser.types import Primitive
-from sigmastar.parser.tokenize import Token
+from sigmastar.parser.types import Primitive, Primitives, Powerset, Stream, FunctionType, type, structure, function_type, powerset_type, stream_type
+from sigmastar.parser.tokenize import Token, builtin_source
 from sigmastar.parser.function import Function
-from typing import get_type_hints
+from sigmastar.parser.optimize import pure
+from typing import get_type_hints, get_origin, get_args
+import collections.abc
 import inspect
 import importlib
-
-primitives = {
-    "N": Primitive("N", "int"),
-    "R": Primitive("R", "float"),
-    "S": Primitive("R", "str"),
-    "B": Primitive("B", "bool"),
-    "A": Primitive("A", "list"),
-    "M": Primitive("M", "dict"),
-}
+import os
 
 type_map = {
-    float: primitives["R"],
-    bool:  primitives["B"],
-    str:  primitives["S"],
-    int:  primitives["N"],
-}
-
-def make_builtin(name: str, args: dict, ret):
-    return Function(Token(name, "__builtins__", 0, 0), args, ret, None)
-
-builtins = {}
-
-import importlib, inspect
-from typing import get_type_hints
-
-def load_python(alias: str, name: str):
-    ext = importlib.import_module(name)
-    original_names = []
-    if alias == "*": alias = ""
-    else: alias += "__"
-    for func_name, func in inspect.getmembers(ext, inspect.isfunction):
-        if func_name.startswith("__"):
-            continue
-        alias_name = f"{alias}{func_name}"
-        original_names.append(func_name+" as "+alias_name)
-        hints = get_type_hints(func)
-        ret_py_type = hints.pop('return', None)
-        args = {arg: type_map[hints[arg]] for arg in hints if hints[arg] in type_map}
-        ret = type_map[ret_py_type]
-        builtins[alias_name] = make_builtin(alias_name, args, ret)
+    float: "R",
+    bool:  "B",
+    str:  "S",
+    int:  "N",
+    list: "A",
+    dict: "M",
+}  # also Callable[[...], ...] as {type}, Sequence[...] as [type] and Iterator[...] as <type>, see _letter
+
+
+class Binding:
+    """Signature of a Python function as primitive letters, or {letters} for callables,
+    independent of any session so that it can be shared across compilations."""
+    __slots__ = ("name", "args", "ret", "is_async", "is_pure", "problem")
+
+    def __init__(self, name: str, args: tuple[tuple[str, str], ...], ret: str, is_async=False, is_pure=False, problem: str | None = None):
+        self.name = name
+        self.args = args
+        self.ret = ret
+        self.is_async = is_async
+        self.is_pure = is_pure
+        self.problem = problem  # why the hints cannot be used, reported only if the function is referenced
+
 
-    if not original_names: 
+_tables: dict[str, tuple[tuple, tuple[Binding, ...]]] = dict()  # module name -> ((file, mtime), bindings)
+
+
+def _letter(hint) -> str:
+    if hint is None or hint is None.__class__:
         return ""
-    return f"from {name} import {', '.join(original_names)}\n"
+    origin = get_origin(hint) or hint
+    if origin in type_map:
+        return type_map[origin]
+    if origin is collections.abc.Callable:
+        params, ret = get_args(hint) or (..., None)
+        if params is ...:
+            raise TypeError(f"{hint!r} needs its argument types, like Callable[[float], float]")
+        letters = "".join(_letter(param) for param in params)+_letter(ret)
+        if "{" in letters or "[" in letters or "<" in letters:
+            raise TypeError(f"{hint!r} takes or returns another callable or sequence")
+        return "{"+letters+"}"
+    if origin is collections.abc.Sequence:
+        # Sequence[float] is the nameless powerset [R], holding lists or typed buffers
+        element = _letter((get_args(hint) or (None,))[0])
+        if len(element) != 1:
+            raise TypeError(f"{hint!r} needs one primitive element type, like Sequence[float]")
+        return "["+element+"]"
+    if origin in (collections.abc.Iterator, collections.abc.Iterable, collections.abc.Generator):
+        # Iterator[float] and generators of floats are the nameless stream <R>
+        element = _letter((get_args(hint) or (None,))[0])
+        if len(element) != 1:
+            raise TypeError(f"{hint!r} needs one primitive element type, like Iterator[float]")
+        return "<"+element+">"
+    raise TypeError(f"unsupported type hint {hint!r}")
+
+
+def _binding(name: str, func, origin: str) -> Binding:
+    is_async = inspect.iscoroutinefunction(func)
+    is_pure = origin in pure or getattr(func, "__sigmastar_pure__", False)
+    try:
+        hints = get_type_hints(func)
+        if "return" not in hints:
+            raise TypeError("missing return type hint")
+        ret_py_type = hints.pop("return")
+        if get_origin(ret_py_type) in (collections.abc.Awaitable, collections.abc.Coroutine):
+            # plain functions hinted to return Awaitable[T] or Coroutine[..., T]
+            ret_py_type = get_args(ret_py_type)[-1]
+            is_async = True
+        for param in inspect.signature(func).parameters.values():
+            if param.name not in hints and param.default is param.empty and param.kind not in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                raise TypeError(f"missing type hint for argument {param.name}")
+        args = tuple((arg, _letter(hint)) for arg, hint in hints.items())
+        ret = _letter(ret_py_type)
+    except Exception as e:
+        return Binding(name, (), "", is_async, is_pure, str(e))
+    return Binding(name, args, ret, is_async, is_pure)
+
+
+def bindings(module) -> tuple[Binding, ...]:
+    """The Binding of each public function of a Python module, cached by module file and mtime."""
+    name = module.__name__
+    file = getattr(module, "__file__", None)
+    try:
+        key = (file, os.path.getmtime(file) if file else None)
+    except OSError:
+        key = (file, None)
+    cached = _tables.get(name)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    table = tuple(_binding(func_name, func, f"{name}.{func_name}") for func_name, func in inspect.getmembers(module, inspect.isfunction)
+                  if not func_name.startswith("__"))
+    _tables[name] = (key, table)
+    return table
+
+
+def make_builtin(name: str, args: dict, ret, origin: str | None = None, is_async=False, is_pure=False, entry: str | None = None):
+    return Function(Token(name, builtin_source, 0, 0), args, ret, None, origin=origin, is_async=is_async, is_pure=is_pure, entry=entry)
+
+
+class CompilerSession:
+    """Owns the primitive and builtin tables of a compilation, so that independent
+    sessions never see each other's declarations and can compile in parallel threads."""
+    def __init__(self):
+        self.primitives = Primitives({
+            "N": Primitive("N", "int"),
+            "R": Primitive("R", "float"),
+            "S": Primitive("S", "str"),
+            "B": Primitive("B", "bool"),
+            "A": Primitive("A", "list"),
+            "M": Primitive("M", "dict"),
+        })
+        self.builtins: dict[str, Function] = dict()
+
+    def load_python(self, alias: str, name: str, referenced: set[str] | None = None):
+        """Makes the functions of a Python module builtins under alias and returns the line
+        that imports them, only for names in referenced if given."""
+        if alias == "*": alias = ""
+        else: alias += "__"
+        ext = importlib.import_module(name)
+        if (getattr(ext, "__file__", None) or "").endswith(".st") and not hasattr(ext, "__sigmastar__"):
+            # the import system hands out modules that are still executing
+            raise ImportError(f"Circular import: {name} is imported while it is still being compiled")
+        if hasattr(ext, "__sigmastar__"):
+            return self.load_sigmastar(alias, name, ext, referenced)
+        original_names = []
+        for binding in bindings(ext):
+            alias_name = f"{alias}{binding.name}"
+            if referenced is not None and alias_name not in referenced:
+                continue
+            if binding.problem:
+                raise Exception(f"Cannot import {name}.{binding.name}: {binding.problem}")
+            original_names.append(binding.name+" as "+alias_name)
+            args = {arg: self._hinted(letter) for arg, letter in binding.args}
+            self.builtins[alias_name] = make_builtin(alias_name, args, self._hinted(binding.ret, returned=True),
+                                                     f"{name}.{binding.name}", binding.is_async, binding.is_pure)
+
+        if not original_names:
+            return ""
+        return f"from {name} import {', '.join(original_names)}\n"
+
+    def _hinted(self, letters: str, returned=False):
+        if letters.startswith("{"):
+            return function_type(structure(Token(letters[1:-1], builtin_source, 0, 0), self.primitives), self.primitives)
+        if letters.startswith("["):
+            return powerset_type(self.primitives[letters[1:-1]], self.primitives)
+        if letters.startswith("<"):
+            return stream_type(self.primitives[letters[1:-1]], self.primitives)
+        if returned:
+            return type(Token(letters, builtin_source, 0, 0), self.primitives)
+        return self.primitives[letters]
+
+    def load_sigmastar(self, alias: str, name: str, module, referenced: set[str] | None = None):
+        # compiled sigmastar modules export their signatures and {type}/[powerset] declarations
+        primitives = self.primitives
+        for key, (kind, base) in module.__sigmastar_types__.items():
+            token = Token(base, builtin_source, 0, 0)
+            if kind == "{":
+                declared = FunctionType(key, structure(token, primitives))
+            else:
+                declared = (Stream if kind == "<" else Powerset)(key, type(token, primitives))
+            if key not in primitives:
+                primitives[key] = declared
+            elif primitives[key].canonical is not primitives.intern(declared).canonical:
+                raise Exception(f"Primitive already exists: {primitives[key].pretty()} but {name} declares {declared.pretty()}")
+        original_names = []
+        for func_name, (arg_names, arg_types, ret_type, entry) in module.__sigmastar__.items():
+            alias_name = f"{alias}{func_name}"
+            if referenced is not None and alias_name not in referenced:
+                continue  # getattr would compile functions of lazy modules
+            # validated call sites bind to the direct entry, and values keep the variadic function
+            direct = f"__{alias_name}_{len(arg_names)}__" if entry != func_name else None
+            original_names.append(func_name+" as "+alias_name)
+            if direct:
+                original_names.append(entry+" as "+direct)
+            args = {arg: primitives[arg_type] for arg, arg_type in zip(arg_names, arg_types)}
+            ret = type(Token(ret_type, builtin_source, 0, 0), primitives)
+            func = getattr(module, func_name)
+            is_pure = getattr(func, "__sigmastar_pure__", False)
+            self.builtins[alias_name] = make_builtin(alias_name, args, ret, f"{name}.{func_name}", inspect.iscoroutinefunction(func), is_pure, direct)
+        if not original_names:
+            return ""
+        return f"from {name} import {', '.join(original_names)}\n"
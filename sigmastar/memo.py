@@ -0,0 +1,50 @@
+# Runtime side of memoization: compiled modules wrap the direct entry point of
+# each pure function with memoize() when they are executed.
+import functools
+
+size: int | None = 0  # entries kept per function, None for unbounded, 0 (the default) disables memoization
+
+
+def pure(func):
+    """Marks a Python function as free of side effects, so that the sigmastar functions calling it can be memoized."""
+    func.__sigmastar_pure__ = True
+    return func
+
+
+class _Exact:
+    """Float argument compared by its repr, so that 0.0 and -0.0 or NaNs get their own entries."""
+    __slots__ = ("value", "key")
+
+    def __init__(self, value: float):
+        self.value = value
+        self.key = repr(value)
+
+    def __eq__(self, other):
+        return other.__class__ is _Exact and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+def memoize(func, floats: bool = False):
+    """Wraps the direct entry of a pure function in an LRU cache. Functions with R arguments
+    pass floats=True, so that their float arguments are keyed by repr."""
+    if size == 0:
+        return func
+    # typed keeps 1 and 1.0 apart across N and R arguments
+    if not floats:
+        return functools.lru_cache(maxsize=size, typed=True)(func)
+    cached = functools.lru_cache(maxsize=size, typed=True)(
+        lambda *args: func(*[arg.value if arg.__class__ is _Exact else arg for arg in args]))
+
+    @functools.wraps(func)
+    def memoized(*args):
+        return cached(*[_Exact(arg) if arg.__class__ is float else arg for arg in args])
+    memoized.cache_info = cached.cache_info
+    memoized.cache_clear = cached.cache_clear
+    return memoized
+
+
+def stats(module) -> dict[str, dict]:
+    """Hits, misses and current sizes of the memo caches of a compiled module."""
+    return {name: func.cache_info()._asdict() for name, func in module.__memo__.items() if hasattr(func, "cache_info")}
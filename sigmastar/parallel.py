@@ -0,0 +1,83 @@
+# Process-pool runtime behind the pmap and preduce builtins of sigmastar code.
+# Workers receive functions by reference, import their compiled module once,
+# and process whole chunks of a powerset per task.
+import functools
+import os
+
+workers: int | None = None  # number of processes, None uses os.cpu_count()
+chunks_per_worker = 4  # more chunks balance uneven work, fewer reduce overheads
+
+_pool = None
+_modules: dict[str, object] = dict()
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _pool = ProcessPoolExecutor(workers)
+    return _pool
+
+
+def _reference(func):
+    """Sigmastar functions are sent as (path, name) so that workers import their module instead of pickling them."""
+    globs = getattr(func, "__globals__", {})
+    if "__sigmastar__" in globs and globs.get(func.__name__) is func:
+        return globs["__file__"], func.__name__
+    if getattr(func, "__name__", "<lambda>") == "<lambda>":
+        raise TypeError("pmap and preduce need a named function, not a lambda")
+    return func
+
+
+def _resolve(reference):
+    if not isinstance(reference, tuple):
+        return reference
+    path, name = reference
+    module = _modules.get(path)
+    if module is None:
+        from sigmastar.parse import import_module
+        module = _modules[path] = import_module(path)
+    return getattr(module, name)
+
+
+def _processes() -> int:
+    return workers or os.cpu_count() or 1
+
+
+def _chunks(values: list) -> list[list]:
+    count = _processes() * chunks_per_worker
+    size = max(1, -(-len(values) // count))
+    if isinstance(values, memoryview):
+        # views of buffers like NumPy arrays cannot be pickled for workers
+        return [values[i:i+size].tolist() for i in range(0, len(values), size)]
+    return [values[i:i+size] for i in range(0, len(values), size)]
+
+
+def _map_chunk(reference, chunk: list) -> list:
+    func = _resolve(reference)
+    return func.map(chunk) if hasattr(func, "map") else [func(value) for value in chunk]
+
+
+def _reduce_chunk(reference, chunk: list):
+    return functools.reduce(_resolve(reference), chunk)
+
+
+def pmap(func, values: list) -> list:
+    """Applies func to every element of a powerset in worker processes, keeping the order."""
+    reference = _reference(func)
+    if len(values) <= 1 or _processes() == 1:
+        return _map_chunk(func, values)
+    chunks = _chunks(values)
+    out = []
+    for result in _executor().map(_map_chunk, [reference]*len(chunks), chunks):
+        out.extend(result)
+    return out
+
+
+def preduce(func, values: list, initial):
+    """Combines initial and all elements of a powerset with an associative func, reducing chunks in worker processes."""
+    reference = _reference(func)
+    if len(values) <= 1 or _processes() == 1:
+        return functools.reduce(func, values, initial)
+    chunks = _chunks(values)
+    return functools.reduce(func, _executor().map(_reduce_chunk, [reference]*len(chunks), chunks), initial)
@@ -1,19 +1,102 @@
 from sigmastar.parser.function import assert_variable_name, Function
-from sigmastar.parser.tokenize import tokenize, Token
+from sigmastar.parser.tokenize import stream, tokenize, Token, TokenStream
+from sigmastar.parser.diagnostics import CompileError
+from sigmastar.parser.optimize import optimize as optimize_functions
+from sigmastar.parser import vectorize as vectorizer
+from sigmastar.parser import tailcalls
+from sigmastar.parser.coroutines import mark_async
+from sigmastar.parser.purity import infer_pure
 from sigmastar.parser.expressions import *
-from sigmastar.parser.types import Type, Primitive, Powerset, FunctionType, type
-from sigmastar.integration import primitives, builtins, load_python
-import importlib
-import atexit
+from sigmastar.parser.types import Primitive, Powerset, Stream, FunctionType, type, structure
+from sigmastar.integration import CompilerSession
+from sigmastar.stats import CompileStats, phase
+from sigmastar import cache
+import warnings
+import inspect
+import weakref
+import re
+import asyncio
+import threading
+import types
+import sys
 import os
 
 
+_marker = re.compile(r"  #@(\d+):(\d+)$")
+_name = re.compile(r"\w+(?:\.(?!\d)\w+)*")
+_generated_name = re.compile(r"^__(.+)_(\d+|map|vec)__$")
+_lazy_lock = threading.RLock()
+
+loaded = weakref.WeakValueDictionary()  # path -> module of import_module() results, for the profiler
+
+
+def generated_path(path: str) -> str:
+    """The file name that code objects compiled from a .st file report."""
+    return os.path.splitext(path)[0] + "__.py"
+
+
+def line_map(code: str) -> tuple[str, tuple]:
+    """Strips the position markers of generated code and returns the code together
+    with (generated line, .st row, .st col) for every marked line."""
+    lines = code.split("\n")
+    positions = []
+    for i, line in enumerate(lines):
+        match = _marker.search(line)
+        if match:
+            positions.append((i+1, int(match.group(1)), int(match.group(2))))
+            lines[i] = line[:match.start()]
+    return "\n".join(lines), tuple(positions)
+
+
+# helpers that every generated module defines
+_runtime = """def __Rprint__(x):
+    print(x)
+    return x
+def _assert_callable(x):
+    if not callable(x): raise Exception('Not yet implemented default callables')
+    return x
+from collections.abc import Sequence as _Sequence
+def _assert_list(x):
+    if isinstance(x, tuple): return list(x)
+    if not isinstance(x, (list, _Sequence)) or isinstance(x, str): raise Exception('Expected a list for a [powerset] value')
+    return x
+from sigmastar.parallel import pmap as _pmap, preduce as _preduce
+from sigmastar.buffers import powerset_R as _powerset_R, powerset_N as _powerset_N, powerset_B as _powerset_B
+from sigmastar.streams import stream as _stream, smap as _smap, sfilter as _sfilter, stake as _stake, snext as _snext, smore as _smore
+def _flatten(*x):
+    if not isinstance(x, tuple): return x
+    out = list()
+    for v in x:
+        if isinstance(v, tuple): out.extend(_flatten(*v))
+        else: out.append(v)
+    return tuple(out)
+"""
+
+
 class Parser:
-    def __init__(self, tokens: list[Token], pos: int):
+    def __init__(self, tokens: list[Token] | TokenStream, pos: int, session: CompilerSession | None = None, stats: CompileStats | None = None):
         self.tokens = tokens
         self.pos = int(pos)
+        self.session = CompilerSession() if session is None else session
+        self.primitives = self.session.primitives
         self.types: dict[str,str] = dict()
+        self.imports: list[str] = list()
+        self.declarations: dict[str, tuple[str, str]] = dict()
+        self.scalar_only: dict[str, vectorizer.Unliftable] = dict()
+        self.stats = stats
+        self.functions: dict[str, Function] = dict()  # in file order, bodies are None until parsed if lazy
+        self.spans: dict[str, tuple[int, int]] = dict()  # token positions of function bodies
+        self.validated: set[str] = set()
+        self.imported = ""
+        self.referenced: set[str] | None = None
     
+    def has(self, pos: int) -> bool:
+        try:
+            self.tokens[pos]
+        except IndexError:
+            return False
+        return True
+
     def next(self) -> Token:
         value = self.tokens[self.pos]
         self.pos += 1
@@ -26,7 +109,7 @@ class Parser:
 
     def _parse_call_single_atom(self):
         value = self.next()
-        if self.pos < len(self.tokens) and str(self.tokens[self.pos]) == "[":
+        if self.has(self.pos) and str(self.tokens[self.pos]) == "[":
             self.pos += 1
             index_expr = self._parse_call()
             self.consume("]", "Expected right bracket to close index access")
@@ -37,17 +120,21 @@ class Parser:
         assert_variable_name(value,) # this is guaranteed to be a function now, so check this
         self.pos += 1 # consume the opening parenthesis
         args = list()
-        while self.pos<len(self.tokens):
+        while self.has(self.pos):
             if str(self.tokens[self.pos])==")":
                 break
             args.append(self._parse_call())
             if str(self.tokens[self.pos])!=")":
                 self.consume(",", "Expected comma to separate argument names")
         self.pos += 1
+        if str(value) in ExpressionParallel.forms:
+            return ExpressionParallel(value, args)
+        if str(value) in ExpressionStream.forms:
+            return ExpressionStream(value, args)
         return ExpressionCall(value, args)
 
     def _parse_call(self):
-        if self.pos < len(self.tokens) and str(self.tokens[self.pos]) == "\\":
+        if self.has(self.pos) and str(self.tokens[self.pos]) == "\\":
             self.consume("\\", "Expected slash to cast")
             target = self.next()
             assert_variable_name(target)
@@ -55,7 +142,7 @@ class Parser:
 
         expr = self._parse_call_single_atom()
         values = []
-        while self.pos < len(self.tokens) and str(self.tokens[self.pos]) == "|":
+        while self.has(self.pos) and str(self.tokens[self.pos]) == "|":
             self.consume("|", "Expected curry operator")
             values.append(expr)
             expr = self._parse_call_single_atom()
@@ -65,11 +152,11 @@ class Parser:
 
     def _parse_assignment(self, result: Token):
         assert_variable_name(result)
-        if self.pos < len(self.tokens) and str(self.tokens[self.pos]) == ",":
+        if self.has(self.pos) and str(self.tokens[self.pos]) == ",":
             self.tokens[self.pos].error("Multiple variables on the left-hand side are not allowed")
         self.consume("=", "Expected assignment here")
         exprs = [self._parse_call()]
-        while self.pos < len(self.tokens) and str(self.tokens[self.pos]) == ",":
+        while self.has(self.pos) and str(self.tokens[self.pos]) == ",":
             self.pos += 1
             exprs.append(self._parse_call())
         return ExpressionAssign(result, exprs)
@@ -85,7 +172,7 @@ class Parser:
 
         other = []
         # check for optional else
-        if self.pos < len(self.tokens) and str(self.tokens[self.pos]) == "else":
+        if self.has(self.pos) and str(self.tokens[self.pos]) == "else":
             self.pos += 1
             self.consume("{", "Expected '{' to start else body")
             other = self._parse_function_body()
@@ -104,13 +191,13 @@ class Parser:
 
     def _parse_function_body(self):
         expressions: list = list()
-        while self.pos<len(self.tokens):
+        while self.has(self.pos):
             token = self.next()
             if str(token)=="}":
                 break
             if str(token) == "return":
                 exprs = [self._parse_call()]
-                while self.pos < len(self.tokens) and str(self.tokens[self.pos]) == ",":
+                while self.has(self.pos) and str(self.tokens[self.pos]) == ",":
                     self.pos += 1  # consume comma
                     exprs.append(self._parse_call())
                 expressions.append(ExpressionReturn(token, exprs))
@@ -118,14 +205,14 @@ class Parser:
                 expressions.append(self._parse_if())
             elif str(token) == "while":
                 expressions.append(self._parse_while())
-            elif self.pos<len(self.tokens) and str(self.tokens[self.pos]) == "(":
+            elif self.has(self.pos) and str(self.tokens[self.pos]) == "(":
                 self.pos -= 1
                 expressions.append(self._parse_call())
             else:
                 expressions.append(self._parse_assignment(token))
         return expressions
 
-    def _parse_function(self):
+    def _parse_function(self, lazy: bool = False):
         # always start with a primitive
         #self.consume("F", "Expected F (function) declaration here")
         name = self.next()
@@ -142,100 +229,299 @@ class Parser:
                 token = self.next()
         sig_type = self.next()
         if str(sig_type)=="{":
-            sig_type = Token("", sig_type.path, sig_type.row, sig_type.col)
+            sig_type = Token("", sig_type.source, sig_type.row, sig_type.col)
             self.pos -= 1
-        signature = Type(sig_type, primitives)
+        signature = structure(sig_type, self.primitives)
         if len(arguments) > len(signature.primitives):
             sig_type.error("There are fewer signature primitives than the number of arguments")
-        self.consume("{", "Expected opening bracket")
-        body = self._parse_function_body()
-        self.pos -= 1
-        self.consume("}", "Expected closing bracket")
+        start = self.pos
+        body = None if lazy else self._parse_body()
+        if lazy:
+            self._skip_body()
+        self.spans[str(name)] = (start, self.pos)
         return Function(name, 
             {str(arg): sig for arg, sig in zip(arguments, signature.primitives)},
-            type(Token("".join([ret.alias for ret in signature.primitives[len(arguments):]]), name.path,name.row,name.col), primitives),
+            type(Token("".join([ret.alias for ret in signature.primitives[len(arguments):]]), name.source,name.row,name.col), self.primitives),
             body,
         )
 
-    def parse(self):
+    def _parse_body(self):
+        self.consume("{", "Expected opening bracket")
+        body = self._parse_function_body()
+        self.pos -= 1
+        self.consume("}", "Expected closing bracket")
+        return body
+
+    def _skip_body(self):
+        self.consume("{", "Expected opening bracket")
+        depth = 1
+        while depth:
+            if not self.has(self.pos):
+                self.tokens[self.pos-1].error("Expected closing bracket")
+            token = str(self.next())
+            if token == "{":
+                depth += 1
+            elif token == "}":
+                depth -= 1
+
+    def _referenced(self) -> set[str]:
+        # every name in the source, so that only builtins it may use are resolved
+        if self.referenced is None:
+            self.referenced = {name.replace(".", "__") for name in _name.findall(self.tokens[0].source.text)}
+        return self.referenced
+
+    def _reachable(self, names) -> list[Function]:
+        """Functions of the module that the given ones call or reference, transitively,
+        parsing bodies that were skipped. Any token naming a function counts."""
+        found = set()
+        pending = [name for name in names if name in self.functions]
+        while pending:
+            name = pending.pop()
+            if name in found:
+                continue
+            found.add(name)
+            func = self.functions[name]
+            start, end = self.spans[name]
+            if func.expressions is None:
+                self.pos = start
+                func.expressions = self._parse_body()
+            for pos in range(start, end):
+                token = self.tokens[pos].name
+                if token in self.functions and token not in found:
+                    pending.append(token)
+        return [func for name, func in self.functions.items() if name in found]
+
+    def parse(self, optimize: int = 0, vectorize: bool = False, entries: tuple[str, ...] | None = None):
+        """Python code of the module. With entries, only those functions and the ones they use
+        are validated and compiled, and a module __getattr__ compiles the rest on first access."""
+        with phase(self.stats, "parse"):
+            self._parse_module(lazy=entries is not None)
+            selected = list(self.functions.values()) if entries is None else self._reachable(entries)
+        lifted = self._check(selected, selected, optimize, vectorize)
+        with phase(self.stats, "codegen"):
+            code = self._code(selected, lifted, (optimize, vectorize) if entries is not None else None)
+        if self.stats is not None:
+            self.stats.functions = len(selected)
+            self.stats.expressions = sum(1 for func in selected for _ in walk(func.expressions))
+            self.stats.generated_bytes = len(code.encode("utf-8"))
+        return code
+
+    def parse_missing(self, name: str, compiled: set[str], optimize: int, vectorize: bool) -> tuple[str, tuple, list[str]]:
+        """Code and line map of a function that a lazily compiled module skipped, together with
+        everything it uses that is not compiled yet, and the names of the functions it defines."""
+        if not self.functions:
+            self._parse_module(lazy=True)
+        selected = self._reachable([name])
+        fresh = [func for func in selected if str(func.name) not in compiled]
+        lifted = self._check(selected, fresh, optimize, vectorize)
+        code, positions = line_map("".join(self._functions_code(fresh, lifted)))
+        return code, positions, [str(func.name) for func in fresh]
+
+    def _check(self, selected: list[Function], fresh: list[Function], optimize: int, vectorize: bool) -> dict[str, str]:
+        """Validates and analyzes selected functions, of which only fresh ones will be compiled,
+        and returns the vectorized code of those that could be lifted."""
+        func_globs = self.session.builtins|{str(function.name): function for function in self.functions.values()}
+        with phase(self.stats, "validate"):
+            diagnostics = list()
+            for func in selected:
+                if str(func.name) in self.validated:
+                    continue
+                try:
+                    func.validate(func_globs, self.primitives)
+                except CompileError as e:
+                    diagnostics.extend(e.diagnostics)
+                self.validated.add(str(func.name))
+            if diagnostics:
+                raise CompileError(diagnostics)
+
+        with phase(self.stats, "analyze"):
+            infer_pure(selected)
+            lifted: dict[str, str] = dict()
+            if vectorize:
+                lifted, self.scalar_only = vectorizer.lift(fresh, self.primitives)
+                for name, problem in self.scalar_only.items():
+                    warnings.warn(f"{name} is not vectorized "+problem.token.diagnostic(problem.reason).format(), vectorizer.VectorizeWarning, stacklevel=3)
+            optimize_functions(fresh, optimize)
+            for name, (token, reason) in tailcalls.eliminate(fresh).items():
+                warnings.warn(f"{name} keeps recursive calls "+token.diagnostic(reason).format(), tailcalls.TailCallWarning, stacklevel=3)
+            diagnostics = mark_async(selected, func_globs)
+            if diagnostics:
+                raise CompileError(diagnostics)
+        return lifted
+
+    def _parse_module(self, lazy: bool = False):
         custom_imports: list[str] = list()
-        functions: list[Function] = list()
-        while self.pos<len(self.tokens):
+        while self.has(self.pos):
             key = self.next()
             value = self.next()
             key_str = str(key)
             value_str = str(value)
             if len(value_str)>=2 and value_str[0]=="\"" and value_str[-1]=="\"":
-                try: custom_imports.append(load_python(key_str, value_str[1:-1]))
+                self.imports.append(value_str[1:-1])
+                try: custom_imports.append(self.session.load_python(key_str, value_str[1:-1], self._referenced()))
+                except CompileError: raise
                 except ModuleNotFoundError as e: value.error(str(e))
                 except Exception as e: value.error(str(e))
             elif value_str=="{":
                 self.pos -= 1
-                if key_str in primitives:
-                    key.error("Primitive already exists: "+primitives[key_str].pretty())
+                if key_str in self.primitives:
+                    key.error("Primitive already exists: "+self.primitives[key_str].pretty())
                 if len(key_str) != 1:
                     key.error("Primitive names must be a single character")
                 self.consume("{", "Expected opening bracket")
-                signature = Type(self.next(), primitives)
+                signature = structure(self.next(), self.primitives)
                 self.consume("}", "Expected closing bracket")
-                primitives[key_str] = FunctionType(key_str, signature)
+                self.primitives[key_str] = FunctionType(key_str, signature)
+                self.declarations[key_str] = ("{", signature.alias)
             elif value_str=="[":
                 self.pos -= 1
-                if key_str in primitives:
-                    key.error("Primitive already exists: "+primitives[key_str].pretty())
+                if key_str in self.primitives:
+                    key.error("Primitive already exists: "+self.primitives[key_str].pretty())
                 if len(key_str) != 1:
                     key.error("Primitive names must be a single character")
                 self.consume("[", "Expected opening bracket")
-                signature = type(self.next(), primitives)
+                signature = type(self.next(), self.primitives)
                 self.consume("]", "Expected closing bracket")
-                primitives[key_str] = Powerset(key_str, signature)
+                self.primitives[key_str] = Powerset(key_str, signature)
+                self.declarations[key_str] = ("[", signature.alias)
+            elif value_str=="<":
+                self.pos -= 1
+                if key_str in self.primitives:
+                    key.error("Primitive already exists: "+self.primitives[key_str].pretty())
+                if len(key_str) != 1:
+                    key.error("Primitive names must be a single character")
+                self.consume("<", "Expected opening angle bracket")
+                signature = type(self.next(), self.primitives)
+                self.consume(">", "Expected closing angle bracket")
+                self.primitives[key_str] = Stream(key_str, signature)
+                self.declarations[key_str] = ("<", signature.alias)
             else: 
                 self.pos -= 2
-                functions.append(self._parse_function())
-        func_globs = builtins|{str(function.name): function for function in functions}
+                function = self._parse_function(lazy)
+                self.functions[str(function.name)] = function
+        self.imported = "\n".join(custom_imports)
 
-        code = "\n".join(custom_imports)
-        for func in functions:
-            func.validate(func_globs)
-        code += "def __Rprint__(x):\n"
-        code += "    print(x)\n"
-        code += "    return x\n"
-        code += "def _assert_callable(x):\n"
-        code += "    if not callable(x): raise Exception('Not yet implemented default callables')\n"
-        code += "    return x\n"
-        code += "def _flatten(*x):\n"
-        code += "    if not isinstance(x, tuple): return x\n"
-        code += "    out = list()\n"
-        code += "    for v in x:\n"
-        code += "        if isinstance(v, tuple): out.extend(_flatten(*v))\n"
-        code += "        else: out.append(v)\n"
-        code += "    return tuple(out)\n"
+    def _code(self, functions: list[Function], lifted: dict[str, str], lazy: tuple[int, bool] | None = None) -> str:
+        # pieces are joined once at the end, since growing one string is quadratic for large modules
+        code = [self.imported, _runtime, "__memo__ = {}\n__sigmastar_compiled__ = set()\n"]
+        code.extend(self._functions_code(functions, lifted))
+        # signatures and declarations for other sigmastar modules that import this one
+        exports = {name: (tuple(func.args), "".join(arg.alias for arg in func.args.values()), func.ret.alias, func.entry_name()) for name, func in self.functions.items()}
+        code.append("\n__sigmastar__ = "+repr(exports)+"\n")
+        code.append("__sigmastar_types__ = "+repr(self.declarations)+"\n")
+        if lazy is not None:
+            code.append("def __getattr__(name):\n")
+            code.append("    from sigmastar.parse import compile_missing\n")
+            code.append("    return compile_missing(globals(), name)\n")
+        code, positions = line_map("".join(code))
+        code += "__sigmastar_lines__ = "+repr(positions)+"\n"
+        if lazy is not None:
+            # (optimize, vectorize, first free line for functions compiled later)
+            code += "__sigmastar_lazy__ = "+repr(lazy+(code.count("\n")+2,))+"\n"
+        return code
+
+    def _functions_code(self, functions: list[Function], lifted: dict[str, str]) -> list[str]:
+        code = list()
+        if lifted:
+            code.append("import numpy as _np\n")
+        if any(func.is_async for func in functions):
+            code.append("from asyncio import gather as _gather\n")
+        memoized = [func for func in functions if func.is_pure and not func.is_async]
+        if memoized:
+            code.append("from sigmastar.memo import memoize as _memoize\n")
         for func in functions:
-            code += func.code(nesting="")
+            name = str(func.name)
+            code.append(func.code(nesting="", vectorized=vectorizer.vec_name(func) if name in lifted else None))
+            code.append(lifted.get(name, ""))
+        for func in memoized:
+            floats = any(isinstance(t, Primitive) and t.actual == "float" for t in func.args.values())
+            code.append(func.entry_name()+" = _memoize("+func.entry_name()+(", True" if floats else "")+")\n")
+            code.append(str(func.name)+".__sigmastar_pure__ = True\n")
+        code.append("__memo__.update({"+", ".join(f"{str(func.name)!r}: {func.entry_name()}" for func in memoized)+"})\n")
+        code.append("__sigmastar_compiled__.update("+repr([str(func.name) for func in functions])+")\n")
         return code
 
 
+def compile_module(path: str, text: str | None = None, session: CompilerSession | None = None, optimize: int = 0, vectorize: bool = False, stats: CompileStats | None = None, entries: tuple[str, ...] | None = None):
+    """Returns the code object of a sigmastar file and the Python modules it imports.
+    Each call uses a fresh session unless one is given to share declarations. With entries,
+    only those functions and the ones they use are compiled until others are accessed."""
+    if stats is None:
+        tokens = stream(path, text)
+    else:
+        # tokenize up front so that its time is not interleaved with parsing
+        with phase(stats, "tokenize"):
+            tokens = tokenize(path, text)
+        stats.tokens = len(tokens)
+    context = Parser(tokens, 0, session, stats)
+    code = context.parse(optimize, vectorize, entries)
+    with phase(stats, "compile"):
+        return compile(code, generated_path(path), "exec"), context.imports
+
+
+def compile_missing(globs: dict, name: str):
+    """Module __getattr__ of lazily compiled modules, which compiles a skipped function
+    and everything it uses into the module on first access."""
+    match = _generated_name.match(name)
+    base = match.group(1) if match else name
+    if base in globs.get("__sigmastar__", ()) and base not in globs["__sigmastar_compiled__"]:
+        with _lazy_lock:
+            if base not in globs["__sigmastar_compiled__"]:
+                optimize, vectorize, line = globs["__sigmastar_lazy__"]
+                parser = globs.get("__sigmastar_parser__")
+                if parser is None:
+                    parser = globs["__sigmastar_parser__"] = Parser(stream(globs["__file__"]), 0)
+                code, positions, _ = parser.parse_missing(base, globs["__sigmastar_compiled__"], optimize, vectorize)
+                # pad to lines after the existing code so that the line map stays sorted
+                exec(compile("\n"*(line-1)+code, generated_path(globs["__file__"]), "exec"), globs)
+                globs["__sigmastar_lines__"] += tuple((i+line-1, row, col) for i, row, col in positions)
+                globs["__sigmastar_lazy__"] = (optimize, vectorize, line+code.count("\n")+1)
+    if name in globs:
+        return globs[name]
+    raise AttributeError(f"module {globs.get('__name__')!r} has no attribute {name!r}")
+
+
+def load_code(path: str, source: bytes, use_cache=True, optimize: int = 0, vectorize: bool = False, stats: CompileStats | None = None, entries: tuple[str, ...] | None = None):
+    with phase(stats, "cache"):
+        code = cache.load(path, source, optimize, vectorize, entries) if use_cache else None
+    if stats is not None:
+        stats.cached = code is not None
+    if code is None:
+        code, imports = compile_module(path, source.decode("utf-8"), optimize=optimize, vectorize=vectorize, stats=stats, entries=entries)
+        if use_cache and not sys.dont_write_bytecode:
+            with phase(stats, "cache"):
+                cache.store(path, source, imports, code, optimize, vectorize, entries)
+    return code
+
+
+def import_module(path, use_cache=True, optimize: int = 0, vectorize: bool = False, stats: bool = False, entries: tuple[str, ...] | None = None):
+    """Compiles and runs a sigmastar file. With vectorize, functions over R, N and B
+    also accept NumPy arrays and return one array per output slot. With stats, returns
+    the module together with the CompileStats of its phases. With entries, like ("main",),
+    other functions are only validated and compiled once accessed, unless those use them."""
+    with open(path, "rb") as file:
+        source = file.read()
+    timings = CompileStats(path) if stats else None
+    code = load_code(path, source, use_cache, optimize, vectorize, timings, entries)
+    module = types.ModuleType(os.path.basename(os.path.splitext(path)[0]) + "__")
+    module.__file__ = path
+    with phase(timings, "exec"):
+        exec(code, module.__dict__)
+    loaded[path] = module
+    return (module, timings) if stats else module
+
+
+def batch(func, columns):
+    """Runs a compiled sigmastar function over columns of arguments, like
+    batch(module.compare, (xs, ys)), and returns one list per output slot."""
+    if not hasattr(func, "map"):
+        raise TypeError(f"{getattr(func, '__name__', func)!r} is not a sigmastar function with arguments")
+    return func.map(*columns)
+
 
-def import_module(path):
-    tokens = tokenize(path)
-    context = Parser(tokens, 0)
-    code = context.parse()
-    base = os.path.splitext(path)[0]
-    py_path = base + "__.py"
-    modname = os.path.basename(base) + "__"
-    if os.path.exists(py_path):
-        raise FileExistsError(f"Temporary file already exists: {py_path}")
-    os.makedirs(os.path.dirname(py_path), exist_ok=True)
-    with open(py_path, "w", encoding="utf-8") as file:
-        file.write(code)
-    atexit.register(lambda: os.path.exists(py_path) and os.remove(py_path))
-    try:
-        spec = importlib.util.spec_from_file_location(modname, py_path)
-        if spec is None or spec.loader is None:
-            raise ImportError(f"Cannot load module from {py_path}")
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-    finally:
-        if os.path.exists(py_path):
-            os.remove(py_path)
-    return module
+def run_main(module):
+    """Calls the main() of a compiled module, on a new event loop if it is async."""
+    result = module.main()
+    if inspect.iscoroutine(result):
+        result = asyncio.run(result)
+    return result
@@ -0,0 +1,33 @@
+# Marks the functions that must compile to `async def`: those awaiting coroutine
+# builtins imported from Python, and transitively everything that calls them.
+from sigmastar.parser.expressions import ExpressionCall, ExpressionValue, ExpressionAssign, ExpressionLambdaApply, walk
+from sigmastar.parser.function import Function
+from sigmastar.parser.diagnostics import Diagnostic
+
+
+def _awaits(expr) -> bool:
+    return isinstance(expr, ExpressionCall) and expr.func is not None and expr.func.is_async
+
+
+def mark_async(functions: list[Function], globs: dict[str, Function]) -> list[Diagnostic]:
+    """Sets is_async on functions that await something and returns the places where
+    async functions are used in ways that cannot be awaited."""
+    changed = True
+    while changed:
+        changed = False
+        for func in functions:
+            if not func.is_async and any(_awaits(expr) for expr in walk(func.expressions)):
+                func.is_async = changed = True
+    diagnostics = []
+    for func in functions:
+        local_names = set(func.args) | {str(expr.result) for expr in walk(func.expressions) if isinstance(expr, ExpressionAssign)}
+        for expr in walk(func.expressions):
+            if isinstance(expr, ExpressionValue) and expr.cache is None and str(expr.value) not in local_names:
+                value = globs.get(str(expr.value))
+                if value is not None and value.is_async:
+                    diagnostics.append(expr.value.diagnostic("Async functions can only be called, not used as values"))
+            elif isinstance(expr, ExpressionLambdaApply):
+                for inner in walk(expr.values):
+                    if _awaits(inner):
+                        diagnostics.append(inner.op.diagnostic("Cannot curry the result of an async call: assign it to a variable first"))
+    return diagnostics
@@ -0,0 +1,34 @@
+class Diagnostic:
+    __slots__ = ("path", "row", "col", "length", "message", "line")
+
+    def __init__(self, path: str, row: int, col: int, length: int, message: str, line: str):
+        self.path = path
+        self.row = row
+        self.col = col
+        self.length = length
+        self.message = message
+        self.line = line
+
+    def format(self, color=False):
+        indicator = " " * (self.col - 1) + "~" * (self.length - 1) + "> " + self.message
+        if color:
+            indicator = "\033[31m" + indicator + "\033[0m"
+        if not self.line:
+            return f"at {self.path}:{self.row}:{self.col}\n{indicator}"
+        return f"at {self.path}:{self.row}:{self.col}\n{self.line}\n{indicator}"
+
+    def __str__(self):
+        return self.format()
+
+
+class CompileError(Exception):
+    """All problems found while compiling a module, each with its row, col and message."""
+    def __init__(self, diagnostics: list[Diagnostic]):
+        super().__init__(diagnostics)
+        self.diagnostics = diagnostics
+
+    def __str__(self):
+        message = str(self.diagnostics[0])
+        if len(self.diagnostics) > 1:
+            message += f"\n({len(self.diagnostics)-1} more errors)"
+        return message
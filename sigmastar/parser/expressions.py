@@ -1,11 +1,12 @@
 from sigmastar.parser.tokenize import Token
-from sigmastar.parser.types import Primitive, FunctionType, Powerset, Type, type
+from sigmastar.parser.types import Primitive, FunctionType, Powerset, Stream, Type, structure, join, function_type
 from sigmastar.parser.function import *
 from sigmastar.parser.function import _flatten
-from sigmastar.integration import primitives
 
 
 class ExpressionIf:
+    __slots__ = ("test", "body", "other")
+
     def __init__(self, test, body: list, other: list):
         self.test = test
         self.body = body
@@ -16,17 +17,17 @@ class ExpressionIf:
         internal_nesting = nesting+"    "
         assert self.body, "Cannot implement if condition without a body"
         for expr in self.body:
-            ret += expr.code(internal_nesting)
+            ret += statement_code(expr, internal_nesting)
         if self.other:
             ret += nesting + "else:\n"
             for expr in self.other:
-                ret += expr.code(internal_nesting)
+                ret += statement_code(expr, internal_nesting)
         return ret
 
     def validate(self, context: Context):
         cond_type = self.test.validate(context)
         assert isinstance(cond_type, (Type, Primitive))
-        if cond_type.alias != primitives["B"].alias:
+        if cond_type is not context.primitives["B"]:
             self.test.value.error(f"If condition must be Boolean, got {cond_type.pretty()}")
         for expr in self.body:
             expr.validate(context)
@@ -35,6 +36,8 @@ class ExpressionIf:
         return None
         
 class ExpressionWhile:
+    __slots__ = ("test", "body")
+
     def __init__(self, test, body: list):
         self.test = test
         self.body = body
@@ -44,26 +47,35 @@ class ExpressionWhile:
         internal_nesting = nesting + "    "
         assert self.body, "Cannot implement while loop without a body"
         for expr in self.body:
-            ret += expr.code(internal_nesting)
+            ret += statement_code(expr, internal_nesting)
         return ret
 
     def validate(self, context: Context):
         cond_type = self.test.validate(context)
         assert isinstance(cond_type, (Type, Primitive))
-        if cond_type.alias != primitives["B"].alias:
+        if cond_type is not context.primitives["B"]:
             self.test.value.error(f"While condition must be Boolean, got {cond_type.pretty()}")
         for expr in self.body:
             expr.validate(context)
         return None
 
 class ExpressionCall:
+    __slots__ = ("op", "args", "func")
+
     def __init__(self, op: Token, args: list):
         assert isinstance(op, Token)
         self.op = op
         self.args = args
+        self.func = None
 
-    def code(self, nesting=""):
-        return nesting+str(self.op)+"("+",".join([arg.code() for arg in self.args])+")"+("\n" if nesting else "")
+    def code(self, nesting="", awaited=True):
+        name = self.func.entry_name() if self.func else str(self.op)
+        call = name+"("+",".join([arg.code() for arg in self.args])+")"
+        if self.func is not None and self.func.expressions is None and isinstance(self.func.ret, Stream):
+            call = "_stream("+call+")"  # lookahead of smore() over iterators returned by Python
+        if awaited and self.func is not None and self.func.is_async:
+            call = "(await "+call+")"
+        return nesting+call+("\n" if nesting else "")
 
     def validate(self, context: Context):
         func = context.globals.get(str(self.op), None)
@@ -73,15 +85,10 @@ class ExpressionCall:
                 self.op.error("No function, {type}, or [powerset] variable with this name")
             elif isinstance(func, FunctionType) or isinstance(func, Powerset):
                 if len(self.args) > len(func.base.primitives):
-                    self.op.error(f"Expected at most {len(func.args)} but got {len(self.args)} arguments")
+                    self.op.error(f"Expected at most {len(func.base.primitives)} but got {len(self.args)} arguments")
                 func = Function(str(self.op), 
                     args={"__arg"+str(idx): arg for idx, arg in enumerate(func.base.primitives[:len(self.args)])}, 
-                    ret=type(
-                        Token(",".join([prim.alias for prim in func.base.primitives[len(self.args):]]),
-                            self.op.path, self.op.row, self.op.col
-                        ), 
-                        primitives
-                    ),
+                    ret=join(func.base.primitives[len(self.args):], context.primitives),
                     expressions=None
                 )
             else:
@@ -93,28 +100,160 @@ class ExpressionCall:
             i += 1
             self_arg_type = self_arg.validate(context)
             assert isinstance(self_arg_type, (Type, Primitive, FunctionType, Powerset))
-            if self_arg_type.comparable() != func.args[func_arg].comparable():
+            if self_arg_type.canonical is not func.args[func_arg].canonical:
                 self.op.error(f"Expected {func.args[func_arg].pretty()} but got {self_arg_type.pretty()} type at argument '{func_arg}' (argument {i})")
+        if func is context.globals.get(str(self.op)):
+            # global functions with a known arity: sigmastar ones bind to their direct entry point
+            self.func = func
         return func.ret
 
+class ExpressionParallel(ExpressionCall):
+    """pmap(f, xs) and preduce(f, xs, init) over powersets, run by sigmastar.parallel in a process pool."""
+    __slots__ = ("form", "result")
+    forms = {"pmap": 2, "preduce": 3}
+
+    def __init__(self, op: Token, args: list):
+        super().__init__(op, args)
+        self.form = None
+        self.result = None  # powerset of pmap results
+
+    def code(self, nesting="", awaited=True):
+        if self.form is None:
+            return super().code(nesting, awaited)
+        code = "_"+self.form+"("+",".join([arg.code() for arg in self.args])+")"
+        if self.result is not None and self.result.actual != "_assert_list":
+            code = self.result.actual+"("+code+")"  # pack results into a typed buffer
+        return nesting+code+("\n" if nesting else "")
+
+    def validate(self, context: Context):
+        name = str(self.op)
+        if name in context.globals or name in context.locals:
+            return super().validate(context)
+        if len(self.args) != self.forms[name]:
+            self.op.error(f"Expected {self.forms[name]} but got {len(self.args)} arguments")
+        func_type = self.args[0].validate(context)
+        values_type = self.args[1].validate(context)
+        if not isinstance(func_type, FunctionType):
+            self.op.error(f"Expected a {{type}} function as the first argument of {name} but got {func_type.pretty()}")
+        func = self.args[0]
+        if not isinstance(func, ExpressionValue) or str(func.value) in context.locals or str(func.value) not in context.globals:
+            # workers import functions by name, so curried values and variables cannot reach them
+            token_of(func).error(f"Expected a function name as the first argument of {name}, not a curried value or variable")
+        if not isinstance(values_type, Powerset) or isinstance(values_type, Stream) or not values_type.base.is_primitive:
+            self.op.error(f"Expected a [powerset] of one primitive as the second argument of {name} but got {values_type.pretty()}")
+        element = values_type.base
+        signature = [func_type.base] if func_type.base.is_primitive else func_type.base.primitives
+        self.form = name
+        if name == "preduce":
+            if len(signature) != 3 or any(t.canonical is not element.canonical for t in signature):
+                self.op.error(f"Expected a function of type {{{element.alias*3}}} to combine elements but got {func_type.pretty()}")
+            initial = self.args[2].validate(context)
+            if initial.canonical is not element.canonical:
+                self.op.error(f"Expected {element.pretty()} but got {initial.pretty()} type as the initial value")
+            return element
+        if len(signature) != 2 or signature[0].canonical is not element.canonical or not signature[1].is_primitive:
+            self.op.error(f"Expected a function that maps one {element.alias} to one primitive but got {func_type.pretty()}")
+        self.result = _declared(context, Powerset, signature[1], self.op)
+        return self.result
+
+
+def _declared(context: Context, kind, element, token: Token):
+    """Declared powerset or stream of the given kind over one element primitive."""
+    for declared in context.primitives.values():
+        if declared.__class__ is kind and declared.base.canonical is element.canonical:
+            return declared
+    brackets = "<>" if kind is Stream else "[]"
+    token.error(f"No {'stream' if kind is Stream else 'powerset'} holds the results: declare one like X {brackets[0]}{element.alias}{brackets[1]}")
+
+
+class ExpressionStream(ExpressionCall):
+    """Lazy stages over <stream> values, run by sigmastar.streams one element at a time."""
+    __slots__ = ("form", "result", "stage")
+    forms = {"stream": 1, "smap": 2, "sfilter": 2, "stake": 2, "snext": 1, "smore": 1, "scollect": 1}
+
+    def __init__(self, op: Token, args: list):
+        super().__init__(op, args)
+        self.form = None
+        self.result = None  # powerset that scollect packs elements into
+        self.stage = None  # sigmastar function given by name to smap or sfilter
+
+    def code(self, nesting="", awaited=True):
+        if self.form is None:
+            return super().code(nesting, awaited)
+        codes = [arg.code() for arg in self.args]
+        if self.stage is not None:
+            codes[0] = self.stage.entry_name()  # elements already have the stage's argument type
+        args = ",".join(codes)
+        if self.form == "scollect":
+            code = ("list" if self.result.actual == "_assert_list" else self.result.actual)+"("+args+")"
+        else:
+            code = "_"+self.form+"("+args+")"
+        return nesting+code+("\n" if nesting else "")
+
+    def validate(self, context: Context):
+        name = str(self.op)
+        if name in context.globals or name in context.locals:
+            return super().validate(context)
+        if len(self.args) != self.forms[name]:
+            self.op.error(f"Expected {self.forms[name]} but got {len(self.args)} arguments")
+        values = self.args[-1] if name in ("smap", "sfilter") else self.args[0]
+        values_type = values.validate(context)
+        if not isinstance(values_type, Powerset) or not values_type.base.is_primitive:
+            self.op.error(f"Expected a <stream> or [powerset] of one primitive in {name} but got {values_type.pretty()}")
+        element = values_type.base
+        self.form = name
+        if name == "stream":
+            return values_type if isinstance(values_type, Stream) else _declared(context, Stream, element, self.op)
+        if not isinstance(values_type, Stream):
+            self.op.error(f"Expected a <stream> in {name} but got {values_type.pretty()}: convert it per stream(...)")
+        if name == "snext":
+            return element
+        if name == "smore":
+            return context.primitives["B"]
+        if name == "scollect":
+            self.result = _declared(context, Powerset, element, self.op)
+            return self.result
+        if name == "stake":
+            count_type = self.args[1].validate(context)
+            if count_type.canonical is not context.primitives["N"].canonical:
+                self.op.error(f"Expected {context.primitives['N'].pretty()} but got {count_type.pretty()} type as the number of elements")
+            return values_type
+        func_type = self.args[0].validate(context)
+        if not isinstance(func_type, FunctionType):
+            self.op.error(f"Expected a {{type}} function as the first argument of {name} but got {func_type.pretty()}")
+        signature = [func_type.base] if func_type.base.is_primitive else func_type.base.primitives
+        stage = context.globals.get(str(self.args[0].value)) if isinstance(self.args[0], ExpressionValue) else None
+        if isinstance(stage, Function) and (stage.expressions is not None or stage.entry) and str(self.args[0].value) not in context.locals:
+            self.stage = stage
+        if name == "sfilter":
+            if len(signature) != 2 or signature[0].canonical is not element.canonical or signature[1] is not context.primitives["B"]:
+                self.op.error(f"Expected a function of type {{{element.alias}B}} to keep elements but got {func_type.pretty()}")
+            return values_type
+        if len(signature) != 2 or signature[0].canonical is not element.canonical or not signature[1].is_primitive:
+            self.op.error(f"Expected a function that maps one {element.alias} to one primitive but got {func_type.pretty()}")
+        return _declared(context, Stream, signature[1], self.op)
+
+
 class ExpressionValue:
+    __slots__ = ("value", "cache")
+
     def __init__(self, value: Token):
         assert isinstance(value, Token)
         self.value = value
-        self.cache: Type | None = None
+        self.cache: str | None = None  # primitive of literals
         s = str(value)
         if s == "True" or s == "False":
-            self.cache = primitives["B"]
+            self.cache = "B"
         elif len(s) >= 2 and s[0] == '"' and s[-1] == '"':
-            self.cache = primitives["S"]
+            self.cache = "S"
         else:
             try:
                 int(s)
-                self.cache = primitives["N"]
+                self.cache = "N"
             except ValueError:
                 try:
                     float(s)
-                    self.cache = primitives["R"]
+                    self.cache = "R"
                 except ValueError:
                     # not a literal number, leave cache None
                     self.cache = None
@@ -125,7 +264,7 @@ class ExpressionValue:
     def validate(self, context: Context):
         if self.cache is not None:
             # literal type determined at construction
-            return self.cache
+            return context.primitives[self.cache]
         self_arg_type = context.locals.get(str(self.value), None)
         if self_arg_type is None:
             self_arg_type = context.globals.get(str(self.value), None)
@@ -133,46 +272,59 @@ class ExpressionValue:
                 self.value.error("No local variable with this name")
             assert isinstance(self_arg_type, Function), "Internal error: need to retrieve function here"
             types = [self_arg_type.args[arg] for arg in self_arg_type.args]+( 
-                [self_arg_type.ret] if self_arg_type.ret.is_primitive else [ret for ret in self_arg_type.ret]
+                [self_arg_type.ret] if self_arg_type.ret.is_primitive else self_arg_type.ret.primitives
             )
-            base = type(Token("".join([t.alias for t in types]), self.value.path, self.value.row, self.value.col), primitives)
-            self_arg_type = FunctionType(base, base=base)
+            base = structure(Token("".join([t.alias for t in types]), self.value.source, self.value.row, self.value.col), context.primitives)
+            self_arg_type = function_type(base, context.primitives)
         return self_arg_type
 
 
+def _slots(t) -> int:
+    return 1 if t.is_primitive else len(t.primitives)
+
+
+def _packed(codes: list[str], layout: list[int]) -> str:
+    """One flat tuple of several values, given how many primitives each one holds:
+    single values are placed as they are and tuples of several ones are unpacked."""
+    parts = [code if slots == 1 else "*"+code if slots else "*("+code+",)[:0]" for code, slots in zip(codes, layout)]
+    return "("+",".join(parts)+",)"
+
+
+def _gathered(exprs: list, nesting: str) -> tuple[str, list[str]]:
+    """Awaits independent async calls among exprs concurrently. Returns the statement
+    that does so, if needed, and the code of each expression."""
+    calls = [expr for expr in exprs if isinstance(expr, ExpressionCall) and expr.func is not None and expr.func.is_async]
+    if len(calls) < 2:
+        return "", [expr.code() for expr in exprs]
+    statement = nesting+"__gathered__ = await _gather("+",".join([call.code(awaited=False) for call in calls])+")\n"
+    return statement, [f"__gathered__[{calls.index(expr)}]" if expr in calls else expr.code() for expr in exprs]
+
+
 class ExpressionReturn:
+    __slots__ = ("token", "exprs", "numrets", "tail", "layout")
+
     def __init__(self, token, exprs: list):
         assert all(isinstance(e, (ExpressionCall, ExpressionValue, ExpressionLambdaApply, ExpressionAccess, ExpressionCast)) for e in exprs)
         assert str(token) == "return"
         self.token = token
         # flatten any nested tuples
         self.exprs = _flatten(exprs)
+        self.numrets = None
+        self.tail = None  # arguments that a tail self-call rebinds, see sigmastar.parser.tailcalls
+        self.layout: list[int] = []  # number of primitives that each expression holds
 
     def code(self, nesting):
-        ret = ""
-        if len(self.exprs) == 1:
-            ret = nesting + "ret = _flatten(" + self.exprs[0].code()+ ")\n"
-        else:
-            ret = nesting+"ret = _flatten("+",".join([expr.code() for expr in self.exprs])+",)\n"
-        if variadic_returns:
-            ret += nesting+"ret = ret if isinstance(ret, tuple) else (ret,)\n"
-            ret += nesting + "for _expected, _actual in zip(__args__[-len(ret):], ret):\n"
-            ret += nesting + "    if _expected is not None:\n"
-            ret += nesting + "        assert _expected == _actual, (\n"
-            ret += nesting + "            f'Return mismatch: expected {_expected!r}, returned {_actual!r}'\n"
-            ret += nesting + "        )\n"
-            ret += nesting + "__args__[-len(ret):] = list(ret)\n"
-            ret += nesting + "__args__ = tuple(__args__)\n"
-            ret += nesting+"__args__ = tuple(list(__args__[:-len(ret)])+list(ret))\n"
-            
-            # ret += nesting+"for a, r in zip(args, ret if isinstance(ret, tuple) else (ret,)):\n"
-            # for i, primitive in enumerate(self.exprs):
-            #     ret += nesting+"    if a is not None: assert a==r, 'Incompatible F (function) spaces'\n"
-            ret += nesting+"if __numrets__==1: return __args__[-1]\n"  # TODO: check if this creates issues with _flatten
-            ret += nesting+"return __args__[-__numrets__:] if __numrets__ else ()\n"
-        else:
-            ret += nesting+"return ret\n"
-        return ret
+        if self.tail is not None:
+            ret, codes = _gathered(self.exprs[0].args, nesting)
+            if self.tail:
+                ret += nesting+",".join(self.tail)+" = "+",".join(codes)+"\n"
+            return ret+nesting+"continue\n"
+        ret, codes = _gathered(self.exprs, nesting)
+        if len(self.exprs) == 1 and self.layout[0] == self.numrets:
+            # single values, or tuples that calls of multi-output functions already return
+            return ret+nesting+"return "+codes[0]+"\n"
+        packed = _packed(codes, self.layout)
+        return ret+nesting+"return "+(packed+"[0]" if self.numrets == 1 else packed)+"\n"
 
     def validate(self, context: Context):
         types = []
@@ -188,15 +340,16 @@ class ExpressionReturn:
                     self.token.error(f"Cannot return nameless powerset{t.pretty()}: create a primitive like X{t.pretty()} and cast to it")
             assert isinstance(t, (Type, Primitive, FunctionType, Powerset))
             types.append(t)
-        joined = type(
-            Token("".join([t.alias for t in types]), self.token.path, self.token.row, self.token.col),
-            primitives
-        )
-        if context.ret.comparable() != joined.comparable():
+        self.layout = [_slots(t) for t in types]
+        joined = join(types, context.primitives)
+        if context.ret.canonical is not joined.canonical:
             self.token.error(f"Expected {context.ret.pretty()} but got {joined.pretty()} type")
+        self.numrets = 1 if context.ret.is_primitive else len(context.ret.primitives)
         return None
 
 class ExpressionCast:
+    __slots__ = ("target", "expr")
+
     def __init__(self, target: Token, expr):
         self.target = target
         self.expr = expr
@@ -206,26 +359,30 @@ class ExpressionCast:
 
     def validate(self, context: Context):
         t = self.expr.validate(context)
-        to = primitives.get(str(self.target))
+        to = context.primitives.get(str(self.target))
         if not to:
             self.target.error(f"No primitive {self.target} defined for cast")
-        if t.comparable() == to.comparable():
+        if t.canonical is to.canonical:
             return to
         if isinstance(t, (FunctionType, Powerset)):
             self.target.error(f"Cannot cast {t.pretty()} to \\{to.pretty()}")
         self.target.error(f"Cannot cast {t.pretty()} to \\{to.pretty()}")
 
 class ExpressionAssign:
+    __slots__ = ("result", "exprs", "layout")
+
     def __init__(self, result: Token, exprs: list):
         assert isinstance(result, Token)
         assert all(isinstance(e, (ExpressionCall, ExpressionValue, ExpressionLambdaApply, ExpressionCast, ExpressionAccess)) for e in exprs)
         self.result = result
         self.exprs = _flatten(exprs)
+        self.layout: list[int] = []  # number of primitives that each expression holds
 
     def code(self, nesting):
+        ret, codes = _gathered(self.exprs, nesting)
         if len(self.exprs) == 1:
-            return nesting + str(self.result) + " = " + self.exprs[0].code()+ "\n"
-        return nesting + str(self.result) + " = _flatten(" + ",".join([e.code() for e in self.exprs]) + ",)\n"
+            return ret + nesting + str(self.result) + " = " + codes[0]+ "\n"
+        return ret + nesting + str(self.result) + " = " + _packed(codes, self.layout) + "\n"
 
     def validate(self, context: Context):
         types = []
@@ -241,16 +398,19 @@ class ExpressionAssign:
                     self.result.error(f"Cannot move nameless powerset{t.pretty()}: create a primitive like X{t.pretty()} and cast to it per {self.result} = \\X expression")
             assert isinstance(t, (Type, Primitive, FunctionType, Powerset))
             types.append(t)
-        joined = type(Token("".join([t.alias for t in types]), self.result.path, self.result.row, self.result.col), primitives)
+        self.layout = [_slots(t) for t in types]
+        joined = join(types, context.primitives)
         prev = context.locals.get(str(self.result), None)
         if not prev:
             context.locals[str(self.result)] = joined
-        elif prev.alias != joined.alias:
+        elif prev.canonical is not joined.canonical:
             self.result.error(f"Previously set {prev.pretty()} but got {joined.pretty()} type")
         return None
 
 
 class ExpressionLambdaApply:
+    __slots__ = ("values", "final")
+
     def __init__(self, values: list, final):
         self.values = values
         self.final = final
@@ -272,21 +432,26 @@ class ExpressionLambdaApply:
             self.values[0].value.error(f"Expected at most {len(arg_prims)-1} captured args but got {len(self.values)}")
         for v, p in zip(self.values, arg_prims[:len(self.values)]):
             vt = v.validate(context)
-            if vt.comparable() != p.comparable():
+            if vt.canonical is not p.canonical:
                 v.value.error(f"Expected type {p.pretty()} for captured argument, got {vt.pretty()}")
         rem = arg_prims[len(self.values):]
-        return FunctionType("", Type(Token("".join([p.alias for p in rem]),
-                              self.values[0].value.path,
+        return function_type(structure(Token("".join([p.alias for p in rem]),
+                              self.values[0].value.source,
                               self.values[0].value.row,
-                              self.values[0].value.col), primitives))
+                              self.values[0].value.col), context.primitives), context.primitives)
 
 
 class ExpressionAccess:
+    __slots__ = ("value_expr", "index_expr", "boolean")
+
     def __init__(self, value_expr, index_expr):
         self.value_expr = value_expr
         self.index_expr = index_expr
+        self.boolean = False  # elements of [B] buffers are stored as bytes
 
     def code(self):
+        if self.boolean:
+            return f"bool({self.value_expr.code()}[{self.index_expr.code()}])"
         return f"{self.value_expr.code()}[{self.index_expr.code()}]"
 
     def validate(self, context: Context):
@@ -298,13 +463,21 @@ class ExpressionAccess:
             )
         idx_type = self.index_expr.validate(context)
         assert isinstance(idx_type, (Type, Primitive))
-        if idx_type.alias != primitives["N"].alias:
+        if idx_type is not context.primitives["N"]:
             self.index_expr.value.error(
-                f"Index must be of type {primitives['N'].pretty()}, "
+                f"Index must be of type {context.primitives['N'].pretty()}, "
                 f"got {idx_type.pretty()}"
             )
+        if isinstance(container_type, Stream):
+            self.value_expr.value.error(f"Cannot index stream {container_type.pretty()}: pull elements per snext(...)")
+        if isinstance(container_type, Powerset):
+            element = container_type.base
+            if isinstance(element, Type) and len(element.primitives) != 1:
+                return element
+            self.boolean = container_type.actual == "_powerset_B"
+            return element if element.is_primitive else element.primitives[0]
         element_type = (
-            container_type.base if isinstance(container_type, (FunctionType, Powerset))
+            container_type.base if isinstance(container_type, FunctionType)
             else container_type
         )
         assert isinstance(element_type, Type), (
@@ -317,4 +490,60 @@ class ExpressionAccess:
                 f"but found {', '.join(sorted(aliases))}"
             )
         only_alias = next(iter(aliases))
-        return primitives[only_alias]
+        return context.primitives[only_alias]
+
+
+def _children(expr) -> list:
+    if isinstance(expr, ExpressionIf):
+        return [expr.test]+expr.body+expr.other
+    if isinstance(expr, ExpressionWhile):
+        return [expr.test]+expr.body
+    if isinstance(expr, (ExpressionReturn, ExpressionAssign)):
+        return expr.exprs
+    if isinstance(expr, ExpressionCast):
+        return [expr.expr]
+    if isinstance(expr, ExpressionLambdaApply):
+        return expr.values+[expr.final]
+    if isinstance(expr, ExpressionAccess):
+        return [expr.value_expr, expr.index_expr]
+    return getattr(expr, "args", [])  # calls and operators left by optimization passes
+
+
+def walk(exprs: list):
+    """Yields the given expressions and all expressions nested in them."""
+    for expr in exprs:
+        yield expr
+        yield from walk(_children(expr))
+
+
+def token_of(expr) -> Token | None:
+    """The token that locates an expression or statement in its .st file."""
+    if isinstance(expr, ExpressionAssign):
+        return expr.result
+    if isinstance(expr, ExpressionReturn):
+        return expr.token
+    if isinstance(expr, (ExpressionIf, ExpressionWhile)):
+        return token_of(expr.test)
+    if isinstance(expr, ExpressionCall):
+        return expr.op
+    if isinstance(expr, ExpressionValue):
+        return expr.value
+    if isinstance(expr, ExpressionCast):
+        return expr.target
+    if isinstance(expr, ExpressionLambdaApply):
+        return token_of(expr.values[0])
+    if isinstance(expr, ExpressionAccess):
+        return token_of(expr.value_expr)
+    for child in getattr(expr, "args", []):
+        return token_of(child)
+    return None
+
+
+def statement_code(expr, nesting: str) -> str:
+    """Code of a statement, with a marker of its .st position that Parser.parse turns into the line map."""
+    code = expr.code(nesting)
+    token = token_of(expr)
+    if token is None or not token.row:
+        return code
+    first, newline, rest = code.partition("\n")
+    return first+f"  #@{token.row}:{token.col}"+newline+rest
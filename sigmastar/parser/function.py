@@ -1,4 +1,4 @@
-from sigmastar.parser.types import Type, Primitive, FunctionType, Powerset
+from sigmastar.parser.types import Type, Primitive, FunctionType, Powerset, Primitives
 from sigmastar.parser.tokenize import Token
 import keyword
 
@@ -17,19 +17,29 @@ def _flatten(values):
     return out
 
 class Context:
-    def __init__(self, globs: dict[str, "Function"], locals, ret):
+    __slots__ = ("globals", "locals", "ret", "primitives")
+
+    def __init__(self, globs: dict[str, "Function"], locals, ret, primitives: Primitives):
         self.globals = globs
         self.locals: dict[str, Type] = {k: v for k, v in locals.items()}
         self.ret = ret
+        self.primitives = primitives
 
 class Function:
-    def __init__(self, name: Token, args: dict[str,Type], ret: Type, expressions: list, is_lambda=False):
+    __slots__ = ("name", "args", "ret", "expressions", "is_lambda", "origin", "is_async", "is_pure", "loops", "entry")
+
+    def __init__(self, name: Token, args: dict[str,Type], ret: Type, expressions: list, is_lambda=False, origin: str | None = None, is_async=False, is_pure=False, entry: str | None = None):
         assert isinstance(ret, Type) or isinstance(ret, Primitive) or isinstance(ret, FunctionType) or isinstance(ret, Powerset)
         self.name = name
         self.args = args
         self.ret = ret
         self.expressions = expressions
         self.is_lambda = is_lambda
+        self.origin = origin  # module.name of builtins imported from Python
+        self.is_async = is_async  # coroutine builtins and the functions that await them
+        self.is_pure = is_pure  # no side effects, so results only depend on arguments
+        self.loops = False  # tail self-calls jump back to the start of the body
+        self.entry = entry  # direct entry point of functions imported from other sigmastar modules
 
     def debug(self):
         print("function:", self.name)
@@ -38,36 +48,103 @@ class Function:
             print("  "+arg+":", self.args[arg].pretty())
         print("return:", self.ret.pretty())
 
-    def code(self, nesting):
-        ret = ""
-        for arg in self.args:
-            if ret:
-                ret += ","
-            ret += arg
+    def marker(self):
+        # .st position of generated function headers, see statement_code
+        return f"  #@{self.name.row}:{self.name.col}" if isinstance(self.name, Token) and self.name.row else ""
+
+    def entry_name(self):
+        # direct positional entry point that validated call sites bind to
+        if self.expressions is None:
+            return self.entry or str(self.name)
+        if not variadic_returns:
+            return str(self.name)
+        return "__"+str(self.name)+"_"+str(len(self.args))+"__"
+
+    def code(self, nesting, vectorized: str | None = None):
+        from sigmastar.parser.expressions import statement_code, ExpressionReturn
+        ret = "\n"+("async def " if self.is_async else "def ")+self.entry_name()+"("+",".join(self.args)+"):"+self.marker()+"\n"
+        body = nesting+"    "
+        if self.loops:
+            ret += body+"while True:\n"
+            body += "    "
+        for expr in self.expressions:
+            ret += statement_code(expr, body)
+        if self.loops and not isinstance(self.expressions[-1], ExpressionReturn):
+            ret += body+"return\n"
         if variadic_returns:
-            ret = "\ndef "+str(self.name)+"(*__args__):\n"
-            nesting += "    "
-            ret += nesting+"__args__ = _flatten(__args__)\n"
-            requisite_args = str((1 if self.ret.is_primitive else len(self.ret.primitives))+len(self.args))
-            ret += nesting+f"__numrets__ = {requisite_args}-len(__args__)\n"
-            ret += nesting+f"assert __numrets__>=0, 'Extra return arguments exceeded the limits of {self.ret.alias}'\n"
-            ret += nesting+f"if __numrets__>0: __args__ = tuple(list(__args__)+[None]*__numrets__)\n"
-            i = 0
-            ret += nesting+"__args__ = list(__args__)\n"
-            for arg_name, arg_type in self.args.items():
-                ret += nesting+f"{arg_name} = __args__[{i}] = {arg_type.actual}(0 if __args__[{i}] is None else __args__[{i}])\n"
-                i += 1
-            # for ret_type in self.ret.primitives:
-            #     ret += nesting+"assert isinstance(args[0], )"
+            ret += self.code_variadic(nesting, vectorized)
+        if self.args:
+            ret += self.code_map(nesting)
+        return ret
+
+    def code_map(self, nesting):
+        # bulk entry point that coerces whole columns and returns one list per output slot
+        numrets = 1 if self.ret.is_primitive else len(self.ret.primitives)
+        name = "__"+str(self.name)+"_map__"
+        rows = "zip("+",".join(f"map({arg_type.actual}, {arg})" for arg, arg_type in self.args.items())+")"
+        call = self.entry_name()+"("+",".join(self.args)+")"
+        target = ",".join(self.args)+","
+        ret = "\n"+("async def " if self.is_async else "def ")+name+"("+",".join(self.args)+"):"+self.marker()+"\n"
+        nesting += "    "
+        if self.is_async:
+            # rows run concurrently on the event loop
+            ret += nesting+f"__rows__ = await _gather(*[{call} for {target} in {rows}])\n"
+            if numrets == 0:
+                ret += nesting+"return ()\n"
+            elif numrets == 1:
+                ret += nesting+"return list(__rows__)\n"
+            else:
+                ret += nesting+f"return tuple(map(list, zip(*__rows__))) if __rows__ else tuple([] for _ in range({numrets}))\n"
+        elif numrets == 0:
+            ret += nesting+f"for {target} in {rows}: {call}\n"
+            ret += nesting+"return ()\n"
+        elif numrets == 1:
+            ret += nesting+f"return [{call} for {target} in {rows}]\n"
         else:
-            ret = "\ndef "+str(self.name)+"("+ret+"):\n"
-            nesting += "    "
-        for expr in self.expressions:
-            ret += expr.code(nesting)
+            ret += nesting+f"__rows__ = [{call} for {target} in {rows}]\n"
+            ret += nesting+f"return tuple(map(list, zip(*__rows__))) if __rows__ else tuple([] for _ in range({numrets}))\n"
+        ret += str(self.name)+".map = "+name+"\n"
+        return ret
+
+    def code_variadic(self, nesting, vectorized: str | None = None):
+        # generic entry point for calls coming from Python, delegates to the direct one
+        # or to the vectorized variant, if any, when called with arrays
+        numrets = 1 if self.ret.is_primitive else len(self.ret.primitives)
+        numargs = len(self.args)
+        ret = "\n"+("async def " if self.is_async else "def ")+str(self.name)+"(*__args__):"+self.marker()+"\n"
+        nesting += "    "
+        if vectorized:
+            ret += nesting+f"if len(__args__)=={numargs} and any(isinstance(arg, _np.ndarray) for arg in __args__):\n"
+            ret += nesting+f"    return {vectorized}(*__args__)\n"
+        ret += nesting+"__args__ = _flatten(__args__)\n"
+        ret += nesting+f"__numrets__ = {numrets+numargs}-len(__args__)\n"
+        ret += nesting+f"assert __numrets__>=0, 'Extra return arguments exceeded the limits of {self.ret.alias}'\n"
+        ret += nesting+f"if __numrets__>0: __args__ += (None,)*__numrets__\n"
+        for i, (arg_name, arg_type) in enumerate(self.args.items()):
+            ret += nesting+f"{arg_name} = {arg_type.actual}(0 if __args__[{i}] is None else __args__[{i}])\n"
+        ret += nesting+"__ret__ = "+("await " if self.is_async else "")+self.entry_name()+"("+",".join(self.args)+")\n"
+        # arguments that were left out are returned before the results, all in one tuple
+        values = list(self.args)
+        if numrets:
+            if numrets == 1:
+                ret += nesting+"__ret__ = (__ret__,)\n"
+            ret += nesting+f"for _expected, _actual in zip(__args__[{numargs}:], __ret__):\n"
+            ret += nesting+"    if _expected is not None:\n"
+            ret += nesting+"        assert _expected == _actual, (\n"
+            ret += nesting+"            f'Return mismatch: expected {_expected!r}, returned {_actual!r}'\n"
+            ret += nesting+"        )\n"
+            values.append("*__ret__")
+        if not values:
+            return ret+nesting+"return ()\n"
+        ret += nesting+"if __numrets__==1: return "+("__ret__[-1]" if numrets else values[-1])+"\n"
+        ret += nesting+"if __numrets__==0: return ()\n"
+        if numrets > 1:
+            ret += nesting+f"if __numrets__<={numrets}: return __ret__[{numrets}-__numrets__:]\n"
+        ret += nesting+"return ("+",".join(values)+",)[-__numrets__:]\n"
         return ret
 
-    def validate(self, globs: dict[str, "Function"]):
-        context = Context(globs, self.args, self.ret)
+    def validate(self, globs: dict[str, "Function"], primitives: Primitives):
+        context = Context(globs, self.args, self.ret, primitives)
         for expr in self.expressions:
             expr.validate(context)
         assert self.expressions, "Cannot validate a function with no expressions"
@@ -0,0 +1,262 @@
+# Optimization passes that run between Function.validate and Function.code.
+# -O1 replaces sigmastar.ext builtins with inline operators, folds constant
+# subexpressions and removes dead branches. -O2 also inlines small functions.
+from sigmastar.parser.expressions import (ExpressionIf, ExpressionWhile, ExpressionCall, ExpressionValue,
+    ExpressionReturn, ExpressionCast, ExpressionAssign, ExpressionLambdaApply, ExpressionAccess)
+from sigmastar.parser.function import Function
+from sigmastar.parser.tokenize import Token
+import sigmastar.ext
+import importlib
+import inspect
+import math
+import json
+import ast
+
+intrinsics = {
+    "sigmastar.ext.N__add": "({0} + {1})",
+    "sigmastar.ext.N__sub": "({0} - {1})",
+    "sigmastar.ext.N__mul": "({0} * {1})",
+    "sigmastar.ext.N__div": "({0} // {1})",
+    "sigmastar.ext.N__lt": "({0} < {1})",
+    "sigmastar.ext.N__gt": "({0} > {1})",
+    "sigmastar.ext.N__le": "({0} <= {1})",
+    "sigmastar.ext.N__ge": "({0} >= {1})",
+    "sigmastar.ext.N__eq": "({0} == {1})",
+    "sigmastar.ext.N__neq": "({0} != {1})",
+    "sigmastar.ext.N__toS": "str({0})",
+    "sigmastar.ext.N__toR": "float({0})",
+    "sigmastar.ext.R__add": "({0} + {1})",
+    "sigmastar.ext.R__sub": "({0} - {1})",
+    "sigmastar.ext.R__mul": "({0} * {1})",
+    "sigmastar.ext.R__div": "({0} / {1})",
+    "sigmastar.ext.R__lt": "({0} < {1})",
+    "sigmastar.ext.R__gt": "({0} > {1})",
+    "sigmastar.ext.R__le": "({0} <= {1})",
+    "sigmastar.ext.R__ge": "({0} >= {1})",
+    "sigmastar.ext.R__eq": "({0} == {1})",
+    "sigmastar.ext.R__neq": "({0} != {1})",
+    "sigmastar.ext.R__toS": "str({0})",
+    "sigmastar.ext.B__not": "(not {0})",
+    "sigmastar.ext.B__eq": "({0} == {1})",
+    "sigmastar.ext.B__neq": "({0} != {1})",
+    "sigmastar.ext.B__toS": "(\"True\" if {0} else \"False\")",
+    "sigmastar.ext.S__eq": "({0} == {1})",
+    "sigmastar.ext.S__neq": "({0} != {1})",
+    "sigmastar.ext.S__cat": "({0} + {1})",
+}
+
+# builtins without side effects, which can be evaluated at compile time
+pure = {f"sigmastar.ext.{name}" for name, _ in inspect.getmembers(sigmastar.ext, inspect.isfunction)
+        if not name.endswith("__print")}
+
+literal_types = {"B": bool, "N": int, "R": float, "S": str}
+
+inline_size = 8  # maximum number of expression nodes of inlined function bodies
+
+
+class ExpressionOperator:
+    __slots__ = ("template", "args")
+
+    def __init__(self, template: str, args: list):
+        self.template = template
+        self.args = args
+
+    def code(self, nesting=""):
+        return nesting+self.template.format(*[arg.code() for arg in self.args])+("\n" if nesting else "")
+
+
+class ExpressionPass:
+    __slots__ = ()
+
+    def code(self, nesting):
+        return nesting+"pass\n"
+
+
+def optimize(functions: list[Function], level: int):
+    if level <= 0:
+        return
+    if level >= 2:
+        for func in functions:
+            func.expressions = _statements(func.expressions, _inline)
+    for func in functions:
+        func.expressions = _prune(_statements(func.expressions, _fold)) or [ExpressionPass()]
+
+
+def _statements(body: list, expression) -> list:
+    """Applies expression() to the expressions of all statements, recursing into nested bodies."""
+    out = []
+    for stmt in body:
+        if isinstance(stmt, ExpressionIf):
+            stmt.test = expression(stmt.test)
+            stmt.body = _statements(stmt.body, expression)
+            stmt.other = _statements(stmt.other, expression)
+        elif isinstance(stmt, ExpressionWhile):
+            stmt.test = expression(stmt.test)
+            stmt.body = _statements(stmt.body, expression)
+        elif isinstance(stmt, (ExpressionReturn, ExpressionAssign)):
+            stmt.exprs = [expression(expr) for expr in stmt.exprs]
+        else:
+            stmt = expression(stmt)
+        out.append(stmt)
+    return out
+
+
+def _is_literal(expr) -> bool:
+    return isinstance(expr, ExpressionValue) and expr.cache is not None
+
+
+def _literal(value, letter: str, token: Token):
+    if literal_types.get(letter) is not value.__class__:
+        return None
+    if letter == "S":
+        text = json.dumps(value)
+    elif letter == "R" and not math.isfinite(value):
+        return None
+    else:
+        text = repr(value)
+    return ExpressionValue(Token(text, token.source, token.row, token.col))
+
+
+def _fold(expr):
+    """Evaluates pure builtins with literal arguments and turns known ext builtins into operators."""
+    if isinstance(expr, ExpressionCall):
+        expr.args = [_fold(arg) for arg in expr.args]
+        func = expr.func
+        if func is None or func.origin is None:
+            return expr
+        if func.origin in pure and all(_is_literal(arg) for arg in expr.args):
+            module, name = func.origin.rsplit(".", 1)
+            try:
+                value = getattr(importlib.import_module(module), name)(*[ast.literal_eval(str(arg.value)) for arg in expr.args])
+            except Exception:
+                value = None  # leave errors like division by zero to runtime
+            folded = None if value is None else _literal(value, func.ret.alias, expr.op)
+            if folded is not None:
+                return folded
+        if func.origin in intrinsics:
+            return ExpressionOperator(intrinsics[func.origin], expr.args)
+    elif isinstance(expr, ExpressionCast):
+        expr.expr = _fold(expr.expr)
+    elif isinstance(expr, ExpressionLambdaApply):
+        expr.values = [_fold(value) for value in expr.values]
+    elif isinstance(expr, ExpressionAccess):
+        expr.value_expr = _fold(expr.value_expr)
+        expr.index_expr = _fold(expr.index_expr)
+    return expr
+
+
+def _prune(body: list) -> list:
+    """Removes branches whose condition folded to a literal, and statements that folded to values."""
+    out = []
+    for stmt in body:
+        if isinstance(stmt, ExpressionIf):
+            stmt.body = _prune(stmt.body)
+            stmt.other = _prune(stmt.other)
+            if _is_literal(stmt.test):
+                out.extend(stmt.body if str(stmt.test.value) == "True" else stmt.other)
+                continue
+            stmt.body = stmt.body or [ExpressionPass()]
+        elif isinstance(stmt, ExpressionWhile):
+            stmt.body = _prune(stmt.body)
+            if _is_literal(stmt.test) and str(stmt.test.value) == "False":
+                continue
+            stmt.body = stmt.body or [ExpressionPass()]
+        elif isinstance(stmt, ExpressionValue):
+            continue
+        out.append(stmt)
+    return out
+
+
+def _is_pure(expr) -> bool:
+    if isinstance(expr, ExpressionValue):
+        return True
+    if isinstance(expr, ExpressionCall):
+        return expr.func is not None and expr.func.origin in pure and all(_is_pure(arg) for arg in expr.args)
+    return False
+
+
+def _size(expr, params: dict[str, int]) -> int | None:
+    """Counts nodes and parameter uses, or returns None for expressions that cannot be moved into callers."""
+    if isinstance(expr, ExpressionValue):
+        if expr.cache is not None:
+            return 1
+        if str(expr.value) not in params:
+            return None  # global names could be shadowed by locals of the caller
+        params[str(expr.value)] += 1
+        return 1
+    if isinstance(expr, ExpressionCall):
+        if expr.func is None:
+            return None  # calls of local {type} variables
+        children = expr.args
+    elif isinstance(expr, ExpressionCast):
+        children = [expr.expr]
+    elif isinstance(expr, ExpressionLambdaApply):
+        children = expr.values+[expr.final]
+    elif isinstance(expr, ExpressionAccess):
+        children = [expr.value_expr, expr.index_expr]
+    else:
+        return None
+    total = 1
+    for child in children:
+        size = _size(child, params)
+        if size is None:
+            return None
+        total += size
+    return total
+
+
+def _calls(expr, func: Function) -> bool:
+    if isinstance(expr, ExpressionCall):
+        return expr.func is func or any(_calls(arg, func) for arg in expr.args)
+    if isinstance(expr, ExpressionCast):
+        return _calls(expr.expr, func)
+    if isinstance(expr, ExpressionLambdaApply):
+        return any(_calls(value, func) for value in expr.values) or _calls(expr.final, func)
+    if isinstance(expr, ExpressionAccess):
+        return _calls(expr.value_expr, func) or _calls(expr.index_expr, func)
+    return False
+
+
+def _substitute(expr, mapping: dict):
+    if isinstance(expr, ExpressionValue):
+        return mapping.get(str(expr.value), expr) if expr.cache is None else expr
+    if isinstance(expr, ExpressionCall):
+        call = ExpressionCall(expr.op, [_substitute(arg, mapping) for arg in expr.args])
+        call.func = expr.func
+        return call
+    if isinstance(expr, ExpressionCast):
+        return ExpressionCast(expr.target, _substitute(expr.expr, mapping))
+    if isinstance(expr, ExpressionLambdaApply):
+        return ExpressionLambdaApply([_substitute(value, mapping) for value in expr.values], _substitute(expr.final, mapping))
+    access = ExpressionAccess(_substitute(expr.value_expr, mapping), _substitute(expr.index_expr, mapping))
+    access.boolean = expr.boolean
+    return access
+
+
+def _inline(expr):
+    """Replaces calls to small non-recursive functions whose body is a single return by that return's expression."""
+    if isinstance(expr, ExpressionCast):
+        expr.expr = _inline(expr.expr)
+    elif isinstance(expr, ExpressionLambdaApply):
+        expr.values = [_inline(value) for value in expr.values]
+    elif isinstance(expr, ExpressionAccess):
+        expr.value_expr = _inline(expr.value_expr)
+        expr.index_expr = _inline(expr.index_expr)
+    if not isinstance(expr, ExpressionCall):
+        return expr
+    expr.args = [_inline(arg) for arg in expr.args]
+    func = expr.func
+    if func is None or func.expressions is None or len(func.expressions) != 1:
+        return expr
+    body = func.expressions[0]
+    if not isinstance(body, ExpressionReturn) or len(body.exprs) != 1 or body.numrets is None:
+        return expr
+    uses = {arg: 0 for arg in func.args}
+    size = _size(body.exprs[0], uses)
+    if size is None or size > inline_size or _calls(body.exprs[0], func):
+        return expr
+    for arg, value in zip(func.args, expr.args):
+        # keep evaluation order, side effects and the cost of each argument unchanged
+        if not _is_pure(value) or (uses[arg] > 1 and not isinstance(value, ExpressionValue)):
+            return expr
+    return _substitute(body.exprs[0], dict(zip(func.args, expr.args)))
@@ -0,0 +1,36 @@
+# Infers which sigmastar functions are pure from the call graph: every call must
+# target a pure builtin or another pure function of the module.
+from sigmastar.parser.expressions import ExpressionCall, walk
+from sigmastar.parser.function import Function
+from sigmastar.parser.types import Primitive, FunctionType, Powerset, Type
+
+_hashable = {"int", "float", "str", "bool"}
+
+
+def _immutable(t) -> bool:
+    if isinstance(t, Primitive):
+        return t.actual in _hashable
+    if isinstance(t, FunctionType):
+        return _immutable(t.base)
+    if isinstance(t, Type):
+        return all(_immutable(p) for p in t.primitives)
+    return False  # powersets and streams are lists or iterators
+
+
+def _memoizable(func: Function) -> bool:
+    # lru_cache needs hashable arguments and must not share mutable results
+    return all(_immutable(t) for t in list(func.args.values())+[func.ret])
+
+
+def infer_pure(functions: list[Function]):
+    """Sets is_pure on functions that only call pure functions, assuming recursion is pure until disproved."""
+    for func in functions:
+        func.is_pure = _memoizable(func)
+    changed = True
+    while changed:
+        changed = False
+        for func in functions:
+            if func.is_pure and not all(expr.func is not None and expr.func.is_pure
+                                        for expr in walk(func.expressions) if isinstance(expr, ExpressionCall)):
+                func.is_pure = False
+                changed = True
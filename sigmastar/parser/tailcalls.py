@@ -0,0 +1,59 @@
+# Rewrites self-calls in tail position, that is `return f(...)` whose result is returned
+# unchanged, into rebinding the arguments of f and jumping back to the start of its body,
+# so that recursion depth no longer limits inputs. Other self-calls stay Python calls
+# and are reported.
+from sigmastar.parser.expressions import ExpressionIf, ExpressionWhile, ExpressionCall, ExpressionReturn, ExpressionLambdaApply, token_of, walk
+from sigmastar.parser.function import Function
+from sigmastar.parser.tokenize import Token
+
+
+class TailCallWarning(UserWarning):
+    """Reports recursive functions whose self-calls could not become loops."""
+
+
+def _self_call(exprs: list, func: Function) -> ExpressionCall | None:
+    for expr in walk(exprs):
+        if isinstance(expr, ExpressionCall) and expr.func is func:
+            return expr
+    return None
+
+
+def _rewrite(exprs: list, func: Function, in_loop: bool, problems: list[tuple[Token, str]]):
+    for expr in exprs:
+        if isinstance(expr, ExpressionIf):
+            tests, bodies = [expr.test], [(expr.body, in_loop), (expr.other, in_loop)]
+        elif isinstance(expr, ExpressionWhile):
+            tests, bodies = [expr.test], [(expr.body, True)]
+        elif isinstance(expr, ExpressionReturn) and len(expr.exprs) == 1 and isinstance(expr.exprs[0], ExpressionCall) and expr.exprs[0].func is func:
+            if in_loop:
+                problems.append((expr.exprs[0].op, "the recursive call is inside a while loop"))
+            else:
+                expr.tail = list(func.args)
+                func.loops = True
+            tests, bodies = expr.exprs[0].args, []
+        else:
+            tests, bodies = [expr], []
+        call = _self_call(tests, func)
+        if call is not None:
+            problems.append((call.op, "the result of the recursive call is not returned unchanged"))
+        for body, loop in bodies:
+            _rewrite(body, func, loop, problems)
+
+
+def eliminate(functions: list[Function]) -> dict[str, tuple[Token, str]]:
+    """Turns tail self-calls of the given functions into loops and returns the first
+    remaining self-call of each function that keeps some, with the reason."""
+    kept = dict()
+    for func in functions:
+        if _self_call(func.expressions, func) is None:
+            continue
+        curried = next((expr for expr in walk(func.expressions) if isinstance(expr, ExpressionLambdaApply)), None)
+        if curried is not None:
+            # curried closures read variables when called, so they would see rebound arguments
+            kept[str(func.name)] = (token_of(curried), "curried values cannot outlive a rebinding of the arguments")
+            continue
+        problems = list()
+        _rewrite(func.expressions, func, False, problems)
+        if problems:
+            kept[str(func.name)] = problems[0]
+    return kept
@@ -1,75 +1,113 @@
+from sigmastar.parser.diagnostics import Diagnostic, CompileError
 import re
-import bisect
+
+
+class Source:
+    """A file whose tokens all share this object instead of each keeping their own path."""
+    __slots__ = ("path", "text", "_lines")
+
+    def __init__(self, path: str, text: str):
+        self.path = path
+        self.text = text
+        self._lines = None
+
+    def line(self, row: int) -> str:
+        if self._lines is None:
+            self._lines = self.text.split("\n")
+        if not (1 <= row <= len(self._lines)):
+            return ""
+        return self._lines[row - 1].rstrip("\r")
+
+
+builtin_source = Source("__builtins__", "")
 
 
 class Token:
-    def __init__(self, name: str, path: str, row: int, col: int):
+    __slots__ = ("name", "source", "row", "col")
+
+    def __init__(self, name: str, source: Source, row: int, col: int):
         self.name = name
-        self.path = path
+        self.source = source
         self.row = row
         self.col = col
 
+    @property
+    def path(self) -> str:
+        return self.source.path
+
     def __str__(self):
         return self.name
 
+    def diagnostic(self, message) -> Diagnostic:
+        return Diagnostic(self.path, self.row, self.col, len(self.name), message, self.source.line(self.row))
+
     def error(self, message):
-        with open(self.path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-        if not (1 <= self.row <= len(lines)):
-            print(f"{self.path}:{self.row}:{self.col}: {self.name}")
-        line = lines[self.row - 1].rstrip("\n")
-        indicator = "\033[31m " * (self.col - 1) + "~" * (len(self.name)-1) + "> " + message + "\033[0m"
-        print(f"at {self.path}:{self.row}:{self.col}\n{line}\n{indicator}")
-        exit(1)
-
-
-def tokenize(path: str):
-    with open(path, "r", encoding="utf-8") as f:
-        text = f.read()
-
-    # --- (a) Strip // comments completely ---
-    # Removes everything from // to end of line.
-    text = re.sub(r"#.*", "", text)
-
-    # Track line starts for row/col calculation
-    line_starts = [0]
-    for m in re.finditer(r"\n", text):
-        line_starts.append(m.end())
-
-    # --- (b) Regex pattern updated to capture double-quoted strings as one token ---
-    pattern = (
-        r"\"(?:\\.|[^\"\\])*\"|"          # double-quoted string with optional escapes
-        r"\d+\.\d+(?:[eE][+-]?\d+)?|"     # 12.34 or 12.34e-5
-        r"\d+\.(?:[eE][+-]?\d+)?|"        # 42. or 42.e+1
-        r"\.\d+(?:[eE][+-]?\d+)?|"        # .5 or .5e3
-        r"\d+(?:[eE][+-]?\d+)|"           # 3e8
-        r"\w+|[^\w\s]"
-    )
-
-    tokens: list[Token] = []
-    for m in re.finditer(pattern, text):
+        raise CompileError([self.diagnostic(message)])
+
+
+# single pass: strings come first so that # inside them is not a comment, dotted
+# names are matched as one token, and numbers take precedence over dots
+_pattern = re.compile(
+    r"\"(?:\\.|[^\"\\])*\"|"          # double-quoted string with optional escapes
+    r"#[^\n]*|"                       # comment to the end of the line
+    r"\d+\.\d+(?:[eE][+-]?\d+)?|"     # 12.34 or 12.34e-5
+    r"\d+\.(?:[eE][+-]?\d+)?|"        # 42. or 42.e+1
+    r"\.\d+(?:[eE][+-]?\d+)?|"        # .5 or .5e3
+    r"\d+(?:[eE][+-]?\d+)|"           # 3e8
+    r"(?P<name>\w+(?:\.(?!\d)\w+)*)|"  # names, where a.b becomes a__b
+    r"[^\w\s]"
+)
+
+
+def scan(text: str, path: str):
+    """Lazily yields the tokens of a text, tracking rows and columns incrementally."""
+    source = Source(path, text)
+    row = 1
+    line_start = 0
+    last = 0
+    for m in _pattern.finditer(text):
         start = m.start()
-        line_idx = bisect.bisect_right(line_starts, start) - 1
-        row = line_idx + 1
-        col = start - line_starts[line_idx] + 1
-        tokens.append(Token(m.group(), path, row, col))
-
-    merged: list[Token] = []
-    i = 0
-    while i < len(tokens):
-        t = tokens[i]
-        if re.fullmatch(r"\w+", t.name):
-            j = i
-            parts = [t.name]
-            while j + 2 < len(tokens) \
-                  and tokens[j+1].name == "." \
-                  and re.fullmatch(r"\w+", tokens[j+2].name):
-                parts.append(tokens[j+2].name)
-                j += 2
-            if len(parts) > 1:
-                merged.append(Token("__".join(parts), t.path, t.row, t.col))
-                i = j + 1
-                continue
-        merged.append(t)
-        i += 1
-    return merged
+        newlines = text.count("\n", last, start)
+        if newlines:
+            row += newlines
+            line_start = text.rfind("\n", last, start) + 1
+        last = start
+        name = m.group()
+        if name[0] == "#":
+            continue
+        if m.lastgroup == "name" and "." in name:
+            name = name.replace(".", "__")
+        yield Token(name, source, row, start - line_start + 1)
+
+
+class TokenStream:
+    """Pulls tokens from a generator on demand while keeping read ones addressable by position."""
+    __slots__ = ("_tokens", "_buffer")
+
+    def __init__(self, tokens):
+        self._tokens = iter(tokens)
+        self._buffer: list[Token] = []
+
+    def __getitem__(self, pos: int) -> Token:
+        buffer = self._buffer
+        while pos >= len(buffer):
+            token = next(self._tokens, None)
+            if token is None:
+                raise IndexError("Token position out of range")
+            buffer.append(token)
+        return buffer[pos]
+
+
+def _read(path: str, text: str | None):
+    if text is None:
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+    return text
+
+
+def tokenize(path: str, text: str | None = None) -> list[Token]:
+    return list(scan(_read(path, text), path))
+
+
+def stream(path: str, text: str | None = None) -> TokenStream:
+    return TokenStream(scan(_read(path, text), path))
@@ -1,9 +1,13 @@
-from sigmastar.parser.tokenize import Token
+from sigmastar.parser.tokenize import Token, builtin_source
 from typing import Union
 import re
 
+_type_pattern = re.compile(r"([A-Za-z])(\d*)")
+
 
 class Primitive:
+    __slots__ = ("alias", "actual", "is_primitive", "canonical")
+
     def __init__(self, alias: str, actual: str):
         assert len(alias)==1, "Primitives can only be one character each"
         self.alias = str(alias)
@@ -17,13 +21,14 @@ class Primitive:
         return "{\\"+self.alias+"}"
 
 class Type:
+    __slots__ = ("alias", "primitives", "is_primitive", "canonical")
+
     def __init__(self, token: Token, primitives: dict[str, Union["Primitive", "Powerset", "FunctionType"]]):
         assert isinstance(token, Token)
         self.alias = str(token)
-        pattern = re.compile(r"([A-Za-z])(\d*)")
         pos = 0
         self.primitives = []
-        for m in pattern.finditer(self.alias):
+        for m in _type_pattern.finditer(self.alias):
             if m.start() != pos:
                 token.error(f"Invalid syntax near '{self.alias[pos:m.start()]}'")
             pos = m.end()
@@ -57,6 +62,8 @@ class Type:
         return self.alias if self.alias else "{}"
 
 class FunctionType:
+    __slots__ = ("alias", "base", "is_primitive", "actual", "canonical")
+
     def __init__(self, alias: str, base: Union[Type,Primitive,"FunctionType", "Powerset"]):
         self.alias = str(alias)
         self.base = base
@@ -65,30 +72,128 @@ class FunctionType:
 
     def comparable(self):
         return "{"+self.base.comparable()+"}"
-    
+
     def pretty(self):
         if self.alias is None: return self.comparable()
         return self.alias+" {"+self.base.comparable()+"}"
 
+buffered = {"float": "R", "int": "N", "bool": "B"}  # Python type of primitives -> letter of their typed powersets
+
+
 class Powerset:
+    __slots__ = ("alias", "base", "is_primitive", "actual", "canonical")
+
     def __init__(self, alias: str, base: Union[Type,Primitive,"FunctionType", "Powerset"]):
         self.alias = str(alias)
         self.base = base
         self.is_primitive = True
-        self.actual = "_assert_list"
+        # R, N and B elements live in typed buffers, see sigmastar.buffers
+        letter = buffered.get(base.actual) if isinstance(base, Primitive) else None
+        self.actual = "_powerset_"+letter if letter else "_assert_list"
 
     def comparable(self):
         return "["+self.base.comparable()+"]"
-    
+
     def pretty(self):
         if self.alias is None: return self.comparable()
         return self.alias+" ["+self.base.comparable()+"]"
 
 
-def type(token: Token, primitives: dict[str, Union["Primitive","Powerset","FunctionType"]]):
-    t = Type(token, primitives)
-    #if not t.primitives:
-    #    token.error("Types must consist of at least one primitive")
-    if len(t.primitives) == 1:
-        return t.primitives[0]
+class Stream(Powerset):
+    """Powerset declared like X <R> whose elements are pulled one at a time from an iterator."""
+    __slots__ = ()
+
+    def __init__(self, alias: str, base: Union[Type,Primitive,"FunctionType", "Powerset"]):
+        super().__init__(alias, base)
+        self.actual = "_stream"
+
+    def comparable(self):
+        return "<"+self.base.comparable()+">"
+
+    def pretty(self):
+        if self.alias is None: return self.comparable()
+        return self.alias+" <"+self.base.comparable()+">"
+
+
+class Primitives(dict):
+    """Primitive table that also interns every type built from it, so that each
+    structural type exists once and equal types share the same canonical object."""
+    def __init__(self, items=()):
+        super().__init__()
+        self.types = dict()       # alias as written -> result of type()
+        self.structures = dict()  # alias as written or normalized -> Type
+        self.anonymous = dict()   # comparable -> nameless FunctionType
+        self.canonicals = dict()  # comparable -> canonical type
+        for key, value in dict(items).items():
+            self[key] = value
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, self.intern(value))
+
+    def clear(self):
+        super().clear()
+        self.types.clear()
+        self.structures.clear()
+        self.anonymous.clear()
+        self.canonicals.clear()
+
+    def intern(self, t):
+        t.canonical = self.canonicals.setdefault(t.comparable(), t)
+        return t
+
+
+def structure(token: Token, primitives: Primitives) -> Type:
+    t = primitives.structures.get(token.name)
+    if t is None:
+        t = Type(token, primitives)
+        t = primitives.structures.setdefault(t.alias, t)
+        primitives.structures[token.name] = primitives.intern(t)
+    return t
+
+
+def type(token: Token, primitives: Primitives):
+    t = primitives.types.get(token.name)
+    if t is None:
+        t = structure(token, primitives)
+        #if not t.primitives:
+        #    token.error("Types must consist of at least one primitive")
+        if len(t.primitives) == 1:
+            t = t.primitives[0]
+        primitives.types[token.name] = t
+    return t
+
+
+def join(types: list, primitives: Primitives):
+    """Type listing the primitives of the given types in order."""
+    alias = "".join([t.alias for t in types])
+    t = primitives.types.get(alias)
+    if t is None:
+        t = type(Token(alias, builtin_source, 0, 0), primitives)
+    return t
+
+
+def function_type(base: Type, primitives: Primitives) -> FunctionType:
+    """Nameless function type {base}."""
+    key = base.comparable()
+    t = primitives.anonymous.get(key)
+    if t is None:
+        t = primitives.anonymous[key] = primitives.intern(FunctionType("", base))
+    return t
+
+
+def powerset_type(base, primitives: Primitives) -> Powerset:
+    """Nameless powerset [base]."""
+    key = "["+base.comparable()+"]"
+    t = primitives.anonymous.get(key)
+    if t is None:
+        t = primitives.anonymous[key] = primitives.intern(Powerset("", base))
+    return t
+
+
+def stream_type(base, primitives: Primitives) -> Stream:
+    """Nameless stream <base>."""
+    key = "<"+base.comparable()+">"
+    t = primitives.anonymous.get(key)
+    if t is None:
+        t = primitives.anonymous[key] = primitives.intern(Stream("", base))
     return t
@@ -0,0 +1,208 @@
+# NumPy backend that lifts functions whose signatures only contain R, N and B
+# into elementwise array functions. Both sides of every if are evaluated for
+# all elements and masks select which values reach each variable or return.
+from sigmastar.parser.expressions import (ExpressionIf, ExpressionWhile, ExpressionCall, ExpressionValue,
+    ExpressionReturn, ExpressionCast, ExpressionAssign, ExpressionLambdaApply, ExpressionAccess)
+from sigmastar.parser.function import Function
+from sigmastar.parser.types import Primitives
+from sigmastar.parser.tokenize import Token
+
+ufuncs = {
+    "sigmastar.ext.N__add": "_np.add({0}, {1})",
+    "sigmastar.ext.N__sub": "_np.subtract({0}, {1})",
+    "sigmastar.ext.N__mul": "_np.multiply({0}, {1})",
+    "sigmastar.ext.N__div": "_np.floor_divide({0}, {1})",
+    "sigmastar.ext.N__lt": "_np.less({0}, {1})",
+    "sigmastar.ext.N__gt": "_np.greater({0}, {1})",
+    "sigmastar.ext.N__le": "_np.less_equal({0}, {1})",
+    "sigmastar.ext.N__ge": "_np.greater_equal({0}, {1})",
+    "sigmastar.ext.N__eq": "_np.equal({0}, {1})",
+    "sigmastar.ext.N__neq": "_np.not_equal({0}, {1})",
+    "sigmastar.ext.N__abs": "_np.abs({0})",
+    "sigmastar.ext.N__toR": "_np.asarray({0}, dtype=float)",
+    "sigmastar.ext.R__add": "_np.add({0}, {1})",
+    "sigmastar.ext.R__sub": "_np.subtract({0}, {1})",
+    "sigmastar.ext.R__mul": "_np.multiply({0}, {1})",
+    "sigmastar.ext.R__div": "_np.true_divide({0}, {1})",
+    "sigmastar.ext.R__lt": "_np.less({0}, {1})",
+    "sigmastar.ext.R__gt": "_np.greater({0}, {1})",
+    "sigmastar.ext.R__le": "_np.less_equal({0}, {1})",
+    "sigmastar.ext.R__ge": "_np.greater_equal({0}, {1})",
+    "sigmastar.ext.R__eq": "_np.equal({0}, {1})",
+    "sigmastar.ext.R__neq": "_np.not_equal({0}, {1})",
+    "sigmastar.ext.R__abs": "_np.abs({0})",
+    "sigmastar.ext.R__floor": "_np.floor({0}).astype(_np.int64)",
+    "sigmastar.ext.R__ceil": "_np.ceil({0}).astype(_np.int64)",
+    "sigmastar.ext.B__not": "_np.logical_not({0})",
+    "sigmastar.ext.B__eq": "_np.equal({0}, {1})",
+    "sigmastar.ext.B__neq": "_np.not_equal({0}, {1})",
+}
+
+dtypes = {"R": "float", "N": "_np.int64", "B": "bool"}
+
+
+class VectorizeWarning(UserWarning):
+    """Reports functions over R, N and B that stay scalar-only."""
+
+
+class Unliftable(Exception):
+    def __init__(self, token: Token, reason: str):
+        super().__init__(reason)
+        self.token = token
+        self.reason = reason
+
+
+def vec_name(func: Function) -> str:
+    return "__"+str(func.name)+"_vec__"
+
+
+def _slots(t) -> list:
+    return [t] if t.is_primitive else list(t.primitives)
+
+
+def candidates(functions: list[Function], primitives: Primitives) -> list[Function]:
+    """Functions with at least one argument and one return whose primitives are all R, N or B."""
+    allowed = {primitives[letter].canonical for letter in dtypes}
+    return [func for func in functions
+            if func.args and _slots(func.ret)
+            and all(t.canonical in allowed for t in list(func.args.values())+_slots(func.ret))]
+
+
+def lift(functions: list[Function], primitives: Primitives) -> tuple[dict[str, str], dict[str, Unliftable]]:
+    """Returns the vectorized code of each liftable function and why the remaining candidates are not liftable."""
+    pending = {str(func.name): func for func in candidates(functions, primitives)}
+    letters = {primitives[letter].canonical: letter for letter in dtypes}
+    lifted: dict[str, str] = dict()
+    failed: dict[str, Unliftable] = dict()
+    visiting: set[str] = set()
+
+    def visit(func: Function) -> bool:
+        name = str(func.name)
+        if name in lifted:
+            return True
+        if name in failed:
+            return False
+        if name in visiting:
+            # both branches of ifs always run, so recursion would never stop
+            failed[name] = Unliftable(func.name, "recursive functions evaluate every branch and never terminate")
+            return False
+        visiting.add(name)
+        try:
+            code = _Lifter(func, letters, visit, pending).code()
+        except Unliftable as e:
+            failed.setdefault(name, e)
+        else:
+            if name not in failed:
+                lifted[name] = code
+        visiting.discard(name)
+        return name in lifted
+
+    for func in pending.values():
+        visit(func)
+    return lifted, failed
+
+
+class _Lifter:
+    def __init__(self, func: Function, letters: dict, visit, pending: dict[str, Function]):
+        self.func = func
+        self.letters = letters
+        self.visit = visit
+        self.pending = pending
+        self.lines: list[str] = list()
+        self.counts: dict[str, int] = {arg: 1 for arg in func.args}
+        self.temps = 0
+
+    def temp(self, value: str, nesting: str) -> str:
+        self.temps += 1
+        name = f"__t{self.temps}__"
+        self.lines.append(f"{nesting}{name} = {value}")
+        return name
+
+    def code(self) -> str:
+        func = self.func
+        rets = [self.letters[t.canonical] for t in _slots(func.ret)]
+        nesting = "    "
+        self.lines.append("\ndef "+vec_name(func)+"("+",".join(func.args)+"):"+func.marker())
+        for arg, t in func.args.items():
+            self.lines.append(f"{nesting}{arg} = _np.asarray({arg}, dtype={dtypes[self.letters[t.canonical]]})")
+        self.lines.append(f"{nesting}__shape__ = _np.broadcast({','.join(func.args)}{',' if len(func.args) == 1 else ''}).shape")
+        self.lines.append(f"{nesting}__active__ = _np.ones(__shape__, dtype=bool)")
+        for i, letter in enumerate(rets):
+            self.lines.append(f"{nesting}__ret{i}__ = _np.zeros(__shape__, dtype={dtypes[letter]})")
+        self.lines.append(f"{nesting}with _np.errstate(all='ignore'):")
+        self.body(func.expressions, None, nesting+"    ")
+        self.lines.append(f"{nesting}    pass")
+        outputs = ", ".join(f"__ret{i}__" for i in range(len(rets)))
+        self.lines.append(f"{nesting}return {outputs}")
+        return "\n".join(self.lines)+"\n"
+
+    def body(self, statements: list, mask: str | None, nesting: str):
+        for stmt in statements:
+            if isinstance(stmt, ExpressionWhile):
+                token = stmt.test.op if isinstance(stmt.test, ExpressionCall) else getattr(stmt.test, "value", self.func.name)
+                raise Unliftable(token, "while loops have data-dependent exits")
+            if isinstance(stmt, ExpressionIf):
+                test = self.temp(f"_np.asarray({self.expr(stmt.test, nesting)[0]}, dtype=bool)", nesting)
+                self.body(stmt.body, test if mask is None else self.temp(f"{mask} & {test}", nesting), nesting)
+                if stmt.other:
+                    other = self.temp(f"~{test}" if mask is None else f"{mask} & ~{test}", nesting)
+                    self.body(stmt.other, other, nesting)
+            elif isinstance(stmt, ExpressionAssign):
+                slots = [slot for expr in stmt.exprs for slot in self.expr(expr, nesting)]
+                name = str(stmt.result)
+                if mask is not None and name in self.counts:
+                    previous = self.slots(name)
+                    slots = [f"_np.where({mask}, {slot}, {prev})" for slot, prev in zip(slots, previous)]
+                self.counts[name] = len(slots)
+                self.lines.append(f"{nesting}{name} = {slots[0] if len(slots) == 1 else '('+', '.join(slots)+',)'}")
+            elif isinstance(stmt, ExpressionReturn):
+                slots = [slot for expr in stmt.exprs for slot in self.expr(expr, nesting)]
+                selected = "__active__" if mask is None else self.temp(f"__active__ & {mask}", nesting)
+                for i, slot in enumerate(slots):
+                    self.lines.append(f"{nesting}__ret{i}__ = _np.where({selected}, {slot}, __ret{i}__)")
+                if mask is None:
+                    return  # every remaining element returned
+                self.lines.append(f"{nesting}__active__ = __active__ & ~{selected}")
+            else:
+                self.expr(stmt, nesting)  # only pure calls reach here, so their result can be dropped
+
+    def slots(self, name: str) -> list[str]:
+        count = self.counts[name]
+        return [name] if count == 1 else [f"{name}[{i}]" for i in range(count)]
+
+    def expr(self, expr, nesting: str) -> list[str]:
+        if isinstance(expr, ExpressionValue):
+            if expr.cache == "S":
+                raise Unliftable(expr.value, "strings have no array form")
+            if expr.cache is not None:
+                return [str(expr.value)]
+            if str(expr.value) not in self.counts:
+                raise Unliftable(expr.value, "function values cannot be applied elementwise")
+            return self.slots(str(expr.value))
+        if isinstance(expr, ExpressionCast):
+            return self.expr(expr.expr, nesting)
+        if isinstance(expr, ExpressionAccess):
+            index = expr.index_expr
+            if not isinstance(expr.value_expr, ExpressionValue) or not isinstance(index, ExpressionValue) or index.cache != "N":
+                raise Unliftable(expr.value_expr.value, "only constant positions can be indexed")
+            return [self.expr(expr.value_expr, nesting)[int(str(index.value))]]
+        if isinstance(expr, ExpressionLambdaApply):
+            raise Unliftable(expr.values[0].value, "lambdas cannot be applied elementwise")
+        func = expr.func
+        if func is None:
+            raise Unliftable(expr.op, "calls of {type} values cannot be applied elementwise")
+        args = [self.expr(arg, nesting)[0] for arg in expr.args]
+        if func.expressions is None:
+            if func.origin in ufuncs:
+                return [ufuncs[func.origin].format(*args)]
+            if func.origin is not None and func.origin.endswith("__print"):
+                raise Unliftable(expr.op, f"{expr.op} has side effects")
+            raise Unliftable(expr.op, f"{expr.op} has no NumPy equivalent")
+        if self.pending.get(str(func.name)) is not func or not self.visit(func):
+            raise Unliftable(expr.op, f"{expr.op} cannot be vectorized")
+        call = vec_name(func)+"("+", ".join(args)+")"
+        count = len(_slots(func.ret))
+        if count == 1:
+            return [call]
+        result = self.temp(call, nesting)
+        return [f"{result}[{i}]" for i in range(count)]
@@ -0,0 +1,223 @@
+# Profiler for compiled sigmastar modules. cProfile measures calls and times of
+# generated functions, a sampling thread finds hot lines, and the line map that
+# every compiled module carries translates both back to .st rows and columns.
+import cProfile
+import pstats
+import threading
+import bisect
+import json
+import time
+import sys
+import os
+import re
+
+_entry = re.compile(r"^__(.+)_\d+__$")
+_variant = re.compile(r"^__(.+)_(map|vec)__$")
+_variants = {"map": "map", "vec": "vectorized"}
+
+
+def _modules() -> dict[str, dict]:
+    """Globals of loaded sigmastar modules by the file name of their code objects."""
+    from sigmastar.parse import loaded, generated_path
+    found = dict()
+    for module in list(sys.modules.values())+list(loaded.values()):
+        globs = getattr(module, "__dict__", None)
+        if globs and "__sigmastar_lines__" in globs and globs.get("__file__"):
+            found[generated_path(globs["__file__"])] = globs
+    return found
+
+
+class _Module:
+    __slots__ = ("path", "names", "memoized", "lines", "positions")
+
+    def __init__(self, globs: dict):
+        self.path = globs["__file__"]
+        self.names = set(globs.get("__sigmastar__", ()))
+        # cache hits never reach the profiled direct entry
+        self.memoized = {name for name, func in globs.get("__memo__", {}).items() if hasattr(func, "cache_info")}
+        self.lines = [line for line, _, _ in globs["__sigmastar_lines__"]]
+        self.positions = [(row, col) for _, row, col in globs["__sigmastar_lines__"]]
+
+    def position(self, line: int) -> tuple[int, int]:
+        i = bisect.bisect_right(self.lines, line)-1
+        return self.positions[i] if i >= 0 else (0, 0)
+
+    def function(self, name: str) -> tuple[str, str]:
+        """The sigmastar function a generated one belongs to, and which entry point it is."""
+        match = _entry.match(name)
+        if match and match.group(1) in self.names:
+            return match.group(1), "direct"
+        match = _variant.match(name)
+        if match and match.group(1) in self.names:
+            return match.group(1), _variants[match.group(2)]
+        if name in self.names:
+            return name, "python"
+        return name, "runtime"
+
+
+class Profiler:
+    """Profiles everything that runs on the current thread between start() and stop(),
+    also usable as `with Profiler() as profiler:`."""
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.profile = cProfile.Profile()
+        self.samples: list[tuple[tuple, float]] = list()  # (stack of frames, seconds represented)
+        self.modules: dict[str, _Module] = dict()
+        self._thread = None
+        self._running = False
+        self._switch = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        target = threading.get_ident()
+        self._running = True
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch, self.interval))
+        self._thread = threading.Thread(target=self._sample, args=(target,), daemon=True)
+        self._thread.start()
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+        self._running = False
+        self._thread.join()
+        sys.setswitchinterval(self._switch)
+        self.modules.update({name: _Module(globs) for name, globs in _modules().items()})
+
+    def _sample(self, target: int):
+        last = time.perf_counter()
+        while self._running:
+            time.sleep(self.interval)
+            frame = sys._current_frames().get(target)
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append((frame.f_code.co_filename, frame.f_code.co_name, frame.f_lineno or 0))
+                frame = frame.f_back
+            self.samples.append((tuple(reversed(stack)), now-last))
+            last = now
+
+    def _frame(self, filename: str, name: str, line: int) -> tuple[str, str, int, int]:
+        module = self.modules.get(filename)
+        if module is None:
+            return filename, name, line, 0
+        function, entry = module.function(name)
+        row, col = module.position(line)
+        return module.path, function if entry == "direct" else f"{function} [{entry}]", row, col
+
+    def functions(self) -> list[dict]:
+        """Calls with inclusive and exclusive seconds of each sigmastar function."""
+        stats = pstats.Stats(self.profile).stats
+        totals = dict()
+        for key, (cc, nc, tt, ct, callers) in stats.items():
+            filename, line, name = key
+            module = self.modules.get(filename)
+            if module is None:
+                continue
+            function, entry = module.function(name)
+            if entry == "runtime":
+                continue
+            total = totals.setdefault((module.path, function), {"function": function, "path": module.path,
+                "row": module.position(line)[0], "calls": 0, "inclusive": 0.0, "exclusive": 0.0,
+                "memoized": function in module.memoized})
+            total["exclusive"] += tt
+            if entry == "direct":
+                total["calls"] += nc
+                total["inclusive"] += ct
+            else:
+                # other entry points only add what they spend outside the direct one
+                direct = [other for other in stats if other[0] == filename and module.function(other[2]) == (function, "direct")]
+                total["inclusive"] += ct-sum(stats[other][4].get(key, (0, 0, 0, 0))[3] for other in direct)
+        return sorted(totals.values(), key=lambda total: -total["inclusive"])
+
+    def lines(self) -> list[dict]:
+        """Samples of the innermost sigmastar line running at each sampling point."""
+        counts = dict()
+        for stack, _ in self.samples:
+            for filename, name, line in reversed(stack):
+                # helpers like _flatten count for the line that called them
+                if filename in self.modules and self.modules[filename].function(name)[1] != "runtime":
+                    path, _, row, col = self._frame(filename, name, line)
+                    if not row:
+                        continue
+                    counts[(path, row, col)] = counts.get((path, row, col), 0)+1
+                    break
+        total = max(1, len(self.samples))
+        return [{"path": path, "row": row, "col": col, "samples": count, "share": count/total}
+                for (path, row, col), count in sorted(counts.items(), key=lambda item: -item[1])]
+
+    def report(self, limit: int = 20) -> str:
+        out = [f"{'function':<32} {'calls':>10} {'inclusive s':>12} {'exclusive s':>12}  location"]
+        functions = self.functions()[:limit]
+        for total in functions:
+            name = total["function"]+(" *" if total["memoized"] else "")
+            out.append(f"{name:<32} {total['calls']:>10} {total['inclusive']:>12.4f} {total['exclusive']:>12.4f}"
+                       f"  {total['path']}:{total['row']}")
+        if any(total["memoized"] for total in functions):
+            out.append("* memoized, calls only count cache misses")
+        out.append("")
+        out.append(f"{'hot lines':<32} {'samples':>10} {'share':>12}  source")
+        sources = dict()
+        for line in self.lines()[:limit]:
+            if line["path"] not in sources:
+                try:
+                    with open(line["path"], encoding="utf-8") as file:
+                        sources[line["path"]] = file.read().split("\n")
+                except OSError:
+                    sources[line["path"]] = []
+            text = sources[line["path"]][line["row"]-1].strip() if 0 < line["row"] <= len(sources[line["path"]]) else ""
+            location = f"{os.path.basename(line['path'])}:{line['row']}:{line['col']}"
+            out.append(f"{location:<32} {line['samples']:>10} {line['share']:>12.1%}  {text}")
+        return "\n".join(out)
+
+    def dump(self, path: str):
+        """Writes a speedscope profile if path ends in .json, or pstats data otherwise,
+        with generated functions renamed after their .st functions and rows."""
+        if path.endswith(".json"):
+            self._dump_speedscope(path)
+            return
+        stats = pstats.Stats(self.profile)
+        def rename(key):
+            if key[0] not in self.modules:
+                return key
+            path, name, row, _ = self._frame(key[0], key[2], key[1])
+            return path, row, name
+
+        stats.stats = {rename(key): (cc, nc, tt, ct, {rename(caller): timing for caller, timing in callers.items()})
+                       for key, (cc, nc, tt, ct, callers) in stats.stats.items()}
+        stats.dump_stats(path)
+
+    def _dump_speedscope(self, path: str):
+        frames = []
+        indexes = dict()
+        samples = []
+        weights = []
+        for stack, seconds in self.samples:
+            # keep frames from the outermost sigmastar function inwards
+            start = next((i for i, frame in enumerate(stack) if frame[0] in self.modules), None)
+            if start is None:
+                continue
+            sample = []
+            for frame in stack[start:]:
+                key = self._frame(*frame)
+                if key not in indexes:
+                    indexes[key] = len(frames)
+                    frames.append({"name": key[1], "file": key[0], "line": key[2], "col": key[3]})
+                sample.append(indexes[key])
+            samples.append(sample)
+            weights.append(seconds)
+        document = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": [{"type": "sampled", "name": "sigmastar", "unit": "seconds",
+                          "startValue": 0, "endValue": sum(weights), "samples": samples, "weights": weights}],
+            "exporter": "sigmastar",
+        }
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(document, file)
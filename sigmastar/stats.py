@@ -0,0 +1,60 @@
+# Per-phase timings and counters of one compilation, returned next to the module
+# per `module, stats = import_module(path, stats=True)` or printed by `--stats`.
+import contextlib
+import time
+
+phases = ("cache", "tokenize", "parse", "validate", "analyze", "codegen", "compile", "exec")
+
+
+class CompileStats:
+    __slots__ = ("path", "seconds", "tokens", "functions", "expressions", "generated_bytes", "cached")
+
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.seconds: dict[str, float] = dict()  # phase -> seconds, in the order of phases
+        self.tokens = 0
+        self.functions = 0
+        self.expressions = 0
+        self.generated_bytes = 0
+        self.cached = False
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+    def as_dict(self) -> dict:
+        return {"path": self.path, "seconds": dict(self.seconds), "total": self.total, "tokens": self.tokens,
+                "functions": self.functions, "expressions": self.expressions,
+                "generated_bytes": self.generated_bytes, "cached": self.cached}
+
+    def report(self) -> str:
+        out = [f"{'phase':<12} {'seconds':>10} {'share':>8}"]
+        total = self.total or 1
+        for name in phases:
+            if name in self.seconds:
+                out.append(f"{name:<12} {self.seconds[name]:>10.4f} {self.seconds[name]/total:>8.1%}")
+        out.append(f"{'total':<12} {self.total:>10.4f}")
+        out.append(f"{self.tokens} tokens, {self.functions} functions, {self.expressions} expressions, "
+                   f"{self.generated_bytes} generated bytes" + (" (from cache)" if self.cached else ""))
+        return "\n".join(out)
+
+
+def phase(stats: CompileStats | None, name: str):
+    """Times a phase into stats, or does nothing without them."""
+    return contextlib.nullcontext() if stats is None else _Phase(stats, name)
+
+
+class _Phase:
+    __slots__ = ("stats", "name", "start")
+
+    def __init__(self, stats: CompileStats, name: str):
+        self.stats = stats
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.seconds[self.name] = self.stats.seconds.get(self.name, 0.0) + time.perf_counter() - self.start
@@ -0,0 +1,61 @@
+# Runtime of <stream> values: iterators with one element of lookahead, so that while
+# loops can ask whether more elements follow, and lazy map, filter and take stages
+# that pull one element through the whole pipeline at a time.
+import itertools
+
+
+class Stream:
+    __slots__ = ("iterator", "pending", "has_pending")
+
+    def __init__(self, values):
+        self.iterator = iter(values)
+        self.pending = None
+        self.has_pending = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.has_pending:
+            value = self.pending
+            self.pending = None
+            self.has_pending = False
+            return value
+        return next(self.iterator)
+
+    def more(self) -> bool:
+        if not self.has_pending:
+            try:
+                self.pending = next(self.iterator)
+            except StopIteration:
+                return False
+            self.has_pending = True
+        return True
+
+
+def stream(values) -> Stream:
+    """Coerces lists, powersets, generators and other iterables to streams."""
+    return values if isinstance(values, Stream) else Stream(values)
+
+
+def smap(func, values: Stream) -> Stream:
+    return Stream(map(func, values))
+
+
+def sfilter(func, values: Stream) -> Stream:
+    return Stream(filter(func, values))
+
+
+def stake(values: Stream, count: int) -> Stream:
+    return Stream(itertools.islice(values, max(0, count)))
+
+
+def smore(values: Stream) -> bool:
+    return values.more()
+
+
+def snext(values: Stream):
+    try:
+        return next(values)
+    except StopIteration:
+        raise Exception("No more elements in the stream: check smore() first") from None
@@ -0,0 +1,32 @@
+import os
+import sigmastar as st
+from sigmastar import memo
+
+
+def _load(tmp_path, source: str):
+    path = os.path.join(tmp_path, "pure.st")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('* "sigmastar.ext"\n\n'+source)
+    return st.import_module(path, use_cache=False)
+
+
+def test_pure_function_with_list_argument(tmp_path, monkeypatch):
+    monkeypatch.setattr(memo, "size", 1024)
+    module = _load(tmp_path, "f(x) AN {\n    return 1\n}\n")
+    assert module.f([1, 2]) == 1
+    assert module.f([1, 2]) == 1
+
+
+def test_float_arguments_keep_signed_zeros_apart(tmp_path, monkeypatch):
+    monkeypatch.setattr(memo, "size", 1024)
+    module = _load(tmp_path, "g(x) RR {\n    return R.mul(x, 2.0)\n}\n")
+    assert repr(module.g(0.0)) == "0.0"
+    assert repr(module.g(-0.0)) == "-0.0"
+    assert module.g(0.0) == 0.0
+    assert memo.stats(module)["g"]["hits"] == 1
+
+
+def test_memoization_is_off_by_default(tmp_path):
+    module = _load(tmp_path, "h(x) NN {\n    return N.add(x, 1)\n}\n")
+    assert module.h(1) == 2
+    assert memo.stats(module) == {}